@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .sendgrid_utils import TransientEmailError, send_email_or_raise_transient
+
+logger = logging.getLogger("accounts.email_queue")
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _async_enabled() -> bool:
+    return bool(getattr(settings, "EMAIL_SEND_ASYNC", True))
+
+
+def _max_retries() -> int:
+    try:
+        return max(0, int(getattr(settings, "EMAIL_SEND_MAX_RETRIES", 5)))
+    except Exception:
+        return 5
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _EXECUTOR_LOCK:
+            if _EXECUTOR is None:
+                try:
+                    workers = max(1, int(getattr(settings, "EMAIL_SEND_WORKERS", 4)))
+                except Exception:
+                    workers = 4
+                _EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="email-send")
+                # Let queued mails finish on a graceful worker shutdown (gunicorn HUP/TERM).
+                atexit.register(_EXECUTOR.shutdown, wait=True)
+    return _EXECUTOR
+
+
+def _run_job(fn: Callable[..., Any], args: tuple, kwargs: dict, retries: int) -> None:
+    """
+    Worker-thread body. Only TransientEmailError is retried, with exponential backoff
+    (1s, 2s, 4s ... capped at 60s). A False result or any other exception is a permanent
+    failure (bad recipient, auth/config error) and is logged once.
+    """
+    name = getattr(fn, "__name__", fn)
+    # Same connection housekeeping Django does around a request: connections past
+    # CONN_MAX_AGE (or failing the health check) are closed; younger ones stay open
+    # for this pool thread's next job.
+    close_old_connections()
+    try:
+        for attempt in range(retries + 1):
+            try:
+                if not fn(*args, **kwargs):
+                    logger.warning("email job %s failed permanently", name)
+                return
+            except TransientEmailError:
+                logger.warning("email job %s failed transiently (attempt %s)", name, attempt + 1)
+            except Exception:
+                logger.exception("email job %s failed", name)
+                return
+            if attempt < retries:
+                time.sleep(min(60.0, float(2 ** attempt)))
+        logger.warning("email job %s gave up after %s attempts", name, retries + 1)
+    finally:
+        close_old_connections()
+
+
+def run_email_job(fn: Callable[..., Any], *args: Any, retries: int = 0, **kwargs: Any) -> bool:
+    """
+    Run an email-sending callable off the request thread.
+
+    The job is submitted after the current `default` DB transaction commits (immediately when
+    no transaction is open), so mails never reference rows that were rolled back.
+    Returns True once the job is queued, not sent: the queue lives in this process, so a
+    worker restart drops pending mails. Do not use it for mails the user cannot request again.
+    With settings.EMAIL_SEND_ASYNC = False the callable runs inline and its own result is returned.
+    """
+    if not _async_enabled():
+        try:
+            return bool(fn(*args, **kwargs))
+        except TransientEmailError:
+            return False
+
+    def _submit() -> None:
+        _get_executor().submit(_run_job, fn, args, kwargs, retries)
+
+    transaction.on_commit(_submit)
+    return True
+
+
+def enqueue_email(
+    subject: str,
+    to_emails: Iterable[str],
+    plain_text_content: str,
+    from_email: Optional[str] = None,
+) -> bool:
+    """
+    Same signature as send_email_via_sendgrid(), but delivery happens in the background,
+    retrying transient failures. Returns True when queued (see run_email_job()).
+    """
+    return run_email_job(
+        send_email_or_raise_transient,
+        subject=subject,
+        to_emails=list(to_emails or []),
+        plain_text_content=plain_text_content,
+        from_email=from_email,
+        retries=_max_retries(),
+    )
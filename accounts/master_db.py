@@ -5,15 +5,18 @@ import json
 import re
 import time
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 from urllib.parse import quote
 
 from django.conf import settings
+from django.core.signals import setting_changed
 from django.db import connections, IntegrityError
+from django.dispatch import receiver
 
 import secrets
 
-from django.contrib.auth.hashers import make_password
+from peds_edu.master_db import make_master_password_hash
 from django.utils import timezone
 
 from .models import RedflagsDoctor
@@ -28,6 +31,8 @@ import logging
 _master_logger = logging.getLogger("accounts.master_db")
 _MASTER_CONN_LOGGED = False
 
+_NON_DIGIT_RE = re.compile(r"\D")
+
 def _mask_email_for_log(email: str) -> str:
     e = (email or "").strip()
     if not e or "@" not in e:
@@ -127,7 +132,9 @@ def authorized_publisher_exists(email: str) -> bool:
 #def master_alias() -> str:
  #   return getattr(settings, "MASTER_DB_ALIAS", "master")
 
+@lru_cache(maxsize=1)
 def master_alias() -> str:
+    # Resolved once per process (cleared by _clear_settings_caches); read on every cursor.
     return getattr(settings, "MASTER_DB_ALIAS", "master")
 
 
@@ -167,7 +174,7 @@ def qn(name: str) -> str:
 def normalize_wa_for_lookup(raw: str) -> str:
     if raw is None:
         return ""
-    digits = re.sub(r"\D", "", str(raw))
+    digits = _NON_DIGIT_RE.sub("", str(raw))
     # Keep last 10 digits for Indian numbers
     if len(digits) > 10:
         digits = digits[-10:]
@@ -185,7 +192,7 @@ def build_whatsapp_deeplink(phone_number: str, message: str) -> str:
 
     Returns a URL suitable for redirecting a browser (mobile will open WhatsApp app when available).
     """
-    digits = re.sub(r"\D", "", str(phone_number or ""))
+    digits = _NON_DIGIT_RE.sub("", str(phone_number or ""))
     if digits:
         # Drop leading zeros (common when people enter 0XXXXXXXXXX)
         while digits.startswith("0") and len(digits) > 10:
@@ -211,6 +218,10 @@ def _normalize_uuid_for_mysql(value: str) -> str:
 
 _ENROLLMENT_META_CACHE: Optional[dict] = None
 
+# (alias, schema, table) -> column names. The schema does not change at runtime, so
+# INFORMATION_SCHEMA is read once per table per process; failed lookups are not cached.
+_TABLE_COLUMNS_CACHE: dict[tuple[str, str, str], tuple[str, ...]] = {}
+
 
 def _db_schema_name(conn) -> str:
     """
@@ -224,19 +235,9 @@ def _db_schema_name(conn) -> str:
 
 
 def _table_exists(conn, table: str) -> bool:
-    schema = _db_schema_name(conn)
-    if not schema:
-        return False
-    sql = """
-        SELECT 1
-        FROM INFORMATION_SCHEMA.TABLES
-        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-        LIMIT 1
-    """
+    # Answered from the (cached) column list: every table has at least one column.
     try:
-        with conn.cursor() as cur:
-            cur.execute(sql, [schema, table])
-            return cur.fetchone() is not None
+        return bool(_get_table_columns(conn, table))
     except Exception:
         return False
 
@@ -245,6 +246,11 @@ def _get_table_columns(conn, table: str) -> list[str]:
     schema = _db_schema_name(conn)
     if not schema:
         return []
+    key = (getattr(conn, "alias", ""), schema, table)
+    cached = _TABLE_COLUMNS_CACHE.get(key)
+    if cached is not None:
+        return list(cached)
+
     sql = """
         SELECT COLUMN_NAME
         FROM INFORMATION_SCHEMA.COLUMNS
@@ -254,7 +260,9 @@ def _get_table_columns(conn, table: str) -> list[str]:
     with conn.cursor() as cur:
         cur.execute(sql, [schema, table])
         rows = cur.fetchall() or []
-    return [r[0] for r in rows if r and r[0]]
+    cols = tuple(r[0] for r in rows if r and r[0])
+    _TABLE_COLUMNS_CACHE[key] = cols
+    return list(cols)
 
 
 def _pick_first_column(cols: list[str], candidates: list[str]) -> str:
@@ -600,7 +608,7 @@ def _get_or_create_campaign_doctor_id(
       - LOWER(email) exact OR RIGHT(phone, 10) match (handles +91 / 91 prefixes)
     """
     email_l = (email or "").strip().lower()
-    phone_digits = re.sub(r"\D", "", str(phone or ""))
+    phone_digits = _NON_DIGIT_RE.sub("", str(phone or ""))
     phone_last10 = phone_digits[-10:] if len(phone_digits) > 10 else phone_digits
 
     if not email_l and not phone_last10:
@@ -885,7 +893,7 @@ def create_doctor_with_enrollment(
     pwd_hash = ""
     pwd_set_at = None
     if initial_password_raw:
-        pwd_hash = make_password(initial_password_raw)
+        pwd_hash = make_master_password_hash(initial_password_raw)
         try:
             pwd_set_at = timezone.now()
         except Exception:
@@ -1259,22 +1267,9 @@ class MasterDoctorLite:
     whatsapp_no: str
 
 
-def get_doctor_by_whatsapp(whatsapp_number: str) -> Optional[MasterDoctorLite]:
-    """
-    Looks up doctor in MASTER redflags_doctor by WhatsApp number.
-
-    - Normalizes to digits and matches by last-10 digits (handles +91/91 prefix).
-    - Uses settings MASTER_DB_DOCTOR_TABLE + column names if provided, else defaults to redflags_doctor schema.
-    - Never raises; returns None on not found.
-    """
-    raw = (whatsapp_number or "").strip()
-    digits = re.sub(r"\D", "", raw)
-    if not digits:
-        return None
-    last10 = digits[-10:] if len(digits) > 10 else digits
-
-    conn = get_master_connection()
-
+@lru_cache(maxsize=1)
+def _doctor_by_whatsapp_query() -> Tuple[str, str]:
+    """(sql, table) for get_doctor_by_whatsapp(); settings and quoting are resolved once per process."""
     # Your live schema is redflags_doctor (as per your settings bottom block)
     table = getattr(settings, "MASTER_DB_DOCTOR_TABLE", "redflags_doctor")
     id_col = getattr(settings, "MASTER_DB_DOCTOR_ID_COLUMN", "doctor_id")
@@ -1291,6 +1286,33 @@ def get_doctor_by_whatsapp(whatsapp_number: str) -> Optional[MasterDoctorLite]:
            OR {qn(wa_col)} = %s
         LIMIT 1
     """
+    return sql, table
+
+
+@receiver(setting_changed)
+def _clear_settings_caches(*, setting, **kwargs):
+    if setting.startswith("MASTER_DB_") or setting == "DATABASES":
+        master_alias.cache_clear()
+        _doctor_by_whatsapp_query.cache_clear()
+        _TABLE_COLUMNS_CACHE.clear()
+
+
+def get_doctor_by_whatsapp(whatsapp_number: str) -> Optional[MasterDoctorLite]:
+    """
+    Looks up doctor in MASTER redflags_doctor by WhatsApp number.
+
+    - Normalizes to digits and matches by last-10 digits (handles +91/91 prefix).
+    - Uses settings MASTER_DB_DOCTOR_TABLE + column names if provided, else defaults to redflags_doctor schema.
+    - Never raises; returns None on not found.
+    """
+    raw = (whatsapp_number or "").strip()
+    digits = _NON_DIGIT_RE.sub("", raw)
+    if not digits:
+        return None
+    last10 = digits[-10:] if len(digits) > 10 else digits
+
+    conn = get_master_connection()
+    sql, table = _doctor_by_whatsapp_query()
 
     try:
         with conn.cursor() as cur:
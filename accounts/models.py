@@ -8,6 +8,9 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, Permis
 from django.core.validators import RegexValidator
 from django.db import models
 from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_encode
 
 
 # ---------------------------------------------------------------------
@@ -68,6 +71,11 @@ def extract_postal_code(address_text: str) -> str | None:
 # ---------------------------------------------------------------------
 
 class UserManager(BaseUserManager):
+    def get_by_natural_key(self, username):
+        # Used by ModelBackend.authenticate(); doctor_login reads user.doctor_profile right after,
+        # so load it in the same query.
+        return self.select_related("doctor_profile").get(**{self.model.USERNAME_FIELD: username})
+
     def create_user(self, email, full_name="", password=None, **extra_fields):
         if not email:
             raise ValueError("The Email must be set")
@@ -103,6 +111,11 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    @cached_property
+    def uidb64(self) -> str:
+        """urlsafe base64 of the pk, as used in password setup/reset links."""
+        return urlsafe_base64_encode(force_bytes(self.pk))
+
 
 # ---------------------------------------------------------------------
 # Clinic
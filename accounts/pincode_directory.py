@@ -11,6 +11,10 @@ from .models import INDIA_STATES_AND_UTS
 
 PINCODE_DIRECTORY_PATH = Path(__file__).resolve().parent / "data" / "india_pincode_directory.json"
 
+# Compiled once: the loader runs these over every directory entry.
+_NON_DIGIT_RE = re.compile(r"\D")
+_PIN_RE = re.compile(r"\d{6}")
+
 
 class IndiaPincodeDirectoryNotReady(RuntimeError):
     """Raised when the pincode directory JSON is missing/unreadable."""
@@ -77,8 +81,8 @@ def load_pincode_directory() -> dict[str, str]:
     # Preferred format: dict
     if isinstance(data, dict):
         for k, v in data.items():
-            pin = re.sub(r"\D", "", str(k or ""))
-            if not re.fullmatch(r"\d{6}", pin):
+            pin = _NON_DIGIT_RE.sub("", str(k or ""))
+            if not _PIN_RE.fullmatch(pin):
                 continue
             state = _canon_state_name(str(v or ""))
             if not state:
@@ -91,8 +95,8 @@ def load_pincode_directory() -> dict[str, str]:
         for row in data:
             if not isinstance(row, dict):
                 continue
-            pin = re.sub(r"\D", "", str(row.get("pincode") or row.get("pin") or row.get("postal_code") or ""))
-            if not re.fullmatch(r"\d{6}", pin):
+            pin = _NON_DIGIT_RE.sub("", str(row.get("pincode") or row.get("pin") or row.get("postal_code") or ""))
+            if not _PIN_RE.fullmatch(pin):
                 continue
             state = _canon_state_name(str(row.get("state") or row.get("State") or row.get("state_name") or ""))
             if not state:
@@ -108,8 +112,8 @@ def load_pincode_directory() -> dict[str, str]:
 
 def get_state_for_pincode(pincode: str) -> Optional[str]:
     """Return canonical state name for a 6-digit pincode, or None if not found."""
-    pin = re.sub(r"\D", "", str(pincode or ""))
-    if not re.fullmatch(r"\d{6}", pin):
+    pin = _NON_DIGIT_RE.sub("", str(pincode or ""))
+    if not _PIN_RE.fullmatch(pin):
         return None
     directory = load_pincode_directory()
     state = directory.get(pin)
@@ -133,8 +137,8 @@ def get_district_for_pincode(pincode: str) -> Optional[str]:
     if mode in ("none", "off", "0"):
         return None
 
-    pin = re.sub(r"\D", "", str(pincode or ""))
-    if not re.fullmatch(r"\d{6}", pin):
+    pin = _NON_DIGIT_RE.sub("", str(pincode or ""))
+    if not _PIN_RE.fullmatch(pin):
         return None
 
     try:
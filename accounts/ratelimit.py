@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_rate(rate: str) -> Tuple[int, int]:
+    """'5/m' -> (5, 60). Invalid rates disable limiting (count 0)."""
+    try:
+        count, period = (rate or "").strip().split("/", 1)
+        return int(count), _PERIODS[period.strip().lower()[:1]]
+    except Exception:
+        return 0, 0
+
+
+def client_ip(request) -> str:
+    # deploy/nginx.conf sets X-Real-IP to $remote_addr; X-Forwarded-For is client-appendable.
+    real_ip = (request.META.get("HTTP_X_REAL_IP") or "").strip()
+    return real_ip or (request.META.get("REMOTE_ADDR") or "").strip()
+
+
+def is_rate_limited(group: str, key: str, rate: str) -> bool:
+    """
+    Fixed-window counter in the default cache (Redis in production).
+
+    Returns True when this call pushes `key` over `rate` for the current window.
+    One cache round-trip in the common case (add succeeds or incr succeeds).
+    Cache failures never block the caller.
+    """
+    limit, period = _parse_rate(rate)
+    if limit <= 0 or not key:
+        return False
+
+    window = int(time.time()) // period
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    cache_key = f"rl:{group}:{window}:{digest}"
+
+    try:
+        if cache.add(cache_key, 1, timeout=period + 1):
+            return False
+        try:
+            count = cache.incr(cache_key)
+        except ValueError:
+            # Expired between add() and incr()
+            cache.set(cache_key, 1, timeout=period + 1)
+            return False
+    except Exception:
+        return False
+
+    return count > limit
+
+
+def password_reset_limited(request, email: str) -> bool:
+    """Per-email and per-IP limits for the forgot-password endpoint."""
+    email_rate = getattr(settings, "RATELIMIT_RESET_PASSWORD_EMAIL", "5/m")
+    ip_rate = getattr(settings, "RATELIMIT_RESET_PASSWORD", "20/m")
+
+    # Evaluate both so each counter advances on every attempt.
+    by_email = is_rate_limited("reset_password_email", (email or "").lower(), email_rate)
+    by_ip = is_rate_limited("reset_password", client_ip(request), ip_rate)
+    return by_email or by_ip
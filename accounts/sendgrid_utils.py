@@ -16,11 +16,15 @@ from urllib.request import Request, urlopen
 from django.apps import apps
 from django.conf import settings
 
-from peds_edu.aws_secrets import get_last_error, get_secret_string
+from peds_edu.aws_secrets import fetch_secret_string_uncached, get_last_error
 
 SENDGRID_API_URL = "https://api.sendgrid.com/v3/mail/send"
 
 
+class TransientEmailError(Exception):
+    """Every provider failed, and at least one for a reason worth retrying (network, HTTP 429/5xx, SMTP 4xx)."""
+
+
 def _truncate(s: str, limit: int = 12000) -> str:
     s = s or ""
     if len(s) <= limit:
@@ -110,12 +114,7 @@ def _aws_secret_name() -> str:
 
 def _get_secret_string_uncached(secret_name: str, region_name: str) -> Tuple[str, Optional[str]]:
     try:
-        wrapped = getattr(get_secret_string, "__wrapped__", None)
-        if wrapped is not None:
-            val = wrapped(secret_name, region_name=region_name)  # type: ignore[misc]
-        else:
-            val = get_secret_string(secret_name, region_name=region_name)
-
+        val = fetch_secret_string_uncached(secret_name, region_name=region_name)
         err = (get_last_error() or "").strip()
         return (val or "").strip(), (err or None)
     except Exception as e:
@@ -245,13 +244,29 @@ def _log_email_attempt(
         return
 
 
+def _http_status_transient(status: Optional[int]) -> bool:
+    # 429 / 5xx may succeed later; other 4xx (bad recipient, auth) will not.
+    return status is not None and (status == 429 or status >= 500)
+
+
+def _smtp_error_transient(e: Exception) -> bool:
+    if isinstance(e, smtplib.SMTPResponseException):
+        return 400 <= e.smtp_code < 500
+    if isinstance(e, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(e, smtplib.SMTPException):
+        return False
+    return isinstance(e, OSError)
+
+
 def _send_via_sendgrid_api(
     *,
     subject: str,
     to_emails: list[str],
     plain_text: str,
     from_email: str,
-) -> Tuple[bool, Optional[int], str, str]:
+) -> Tuple[bool, Optional[int], str, str, bool]:
+    """(ok, status, response/diagnostics, error, transient) for one SendGrid API send."""
     candidates, aws_diag = _iter_sendgrid_api_key_candidates()
 
     diag_base = {
@@ -265,7 +280,7 @@ def _send_via_sendgrid_api(
     }
 
     if not candidates:
-        return False, None, json.dumps(diag_base), "No SendGrid API key candidates found"
+        return False, None, json.dumps(diag_base), "No SendGrid API key candidates found", False
 
     safe_html = "<pre>" + html_lib.escape(plain_text or "") + "</pre>"
 
@@ -283,6 +298,7 @@ def _send_via_sendgrid_api(
     last_status: Optional[int] = None
     last_err_text: str = ""
     last_err_body: str = ""
+    last_transient = False
 
     for cand in candidates:
         api_key = cand.key
@@ -314,11 +330,12 @@ def _send_via_sendgrid_api(
                 combined += "\n" + _truncate(body, 12000)
 
             if ok:
-                return True, int(status), combined, ""
+                return True, int(status), combined, "", False
 
             last_status = int(status) if isinstance(status, int) else None
             last_err_text = f"HTTP {status}"
             last_err_body = body
+            last_transient = _http_status_transient(last_status)
 
             if status in (401, 403):
                 continue
@@ -335,16 +352,20 @@ def _send_via_sendgrid_api(
             last_status = int(status) if isinstance(status, int) else None
             last_err_text = f"HTTPError {status}"
             last_err_body = body
+            last_transient = _http_status_transient(last_status)
             if status in (401, 403):
                 continue
             break
         except URLError as e:
             last_status = None
             last_err_text = f"URLError: {e}"
+            last_transient = True
             break
         except Exception as e:
             last_status = None
             last_err_text = f"{type(e).__name__}: {e}"
+            # Socket timeouts/resets surface as OSError subclasses.
+            last_transient = isinstance(e, OSError)
             break
 
     diag = dict(diag_base)
@@ -352,7 +373,7 @@ def _send_via_sendgrid_api(
     combined = json.dumps(diag)
     if last_err_body:
         combined += "\n" + _truncate(last_err_body, 12000)
-    return False, last_status, combined, last_err_text or "SendGrid API send failed"
+    return False, last_status, combined, last_err_text or "SendGrid API send failed", last_transient
 
 
 def _send_via_smtp(
@@ -361,7 +382,8 @@ def _send_via_smtp(
     to_emails: list[str],
     plain_text: str,
     from_email: str,
-) -> Tuple[bool, Optional[int], str, str]:
+) -> Tuple[bool, Optional[int], str, str, bool]:
+    """(ok, status, diagnostics, error, transient) for one SMTP send."""
     host = str(getattr(settings, "EMAIL_HOST", "") or "smtp.sendgrid.net").strip()
     port = int(getattr(settings, "EMAIL_PORT", 587) or 587)
     use_tls = bool(getattr(settings, "EMAIL_USE_TLS", True))
@@ -388,7 +410,7 @@ def _send_via_smtp(
             "probe": probe,
             "aws_secrets": aws_diag,
         }
-        return False, None, json.dumps(diag), "No SMTP password available"
+        return False, None, json.dumps(diag), "No SMTP password available", False
 
     msg = EmailMessage()
     msg["Subject"] = subject
@@ -432,7 +454,7 @@ def _send_via_smtp(
             "smtp_password_tail": _redacted_tail(pw, 4),
             "aws_secrets": aws_diag,
         }
-        return True, 250, json.dumps(diag), ""
+        return True, 250, json.dumps(diag), "", False
     except Exception as e:
         diag = {
             "provider": "smtp",
@@ -445,7 +467,7 @@ def _send_via_smtp(
             "smtp_password_source": pw_src,
             "aws_secrets": aws_diag,
         }
-        return False, None, json.dumps(diag), str(e)
+        return False, None, json.dumps(diag), str(e), _smtp_error_transient(e)
 
 
 def send_email_via_sendgrid(
@@ -454,6 +476,32 @@ def send_email_via_sendgrid(
     plain_text_content: str,
     from_email: Optional[str] = None,
 ) -> bool:
+    return _send_email(subject, to_emails, plain_text_content, from_email)[0]
+
+
+def send_email_or_raise_transient(
+    subject: str,
+    to_emails: Iterable[str],
+    plain_text_content: str,
+    from_email: Optional[str] = None,
+) -> bool:
+    """
+    send_email_via_sendgrid(), but raises TransientEmailError when a retry could succeed.
+    A False return is a permanent failure (bad recipient, auth/config problem).
+    """
+    ok, transient = _send_email(subject, to_emails, plain_text_content, from_email)
+    if not ok and transient:
+        raise TransientEmailError(subject)
+    return ok
+
+
+def _send_email(
+    subject: str,
+    to_emails: Iterable[str],
+    plain_text_content: str,
+    from_email: Optional[str] = None,
+) -> Tuple[bool, bool]:
+    """(ok, transient failure) across the configured providers."""
     subject = (subject or "").strip()
     recipients = [str(e).strip() for e in (to_emails or []) if e and str(e).strip()]
     recipients = list(dict.fromkeys(recipients))
@@ -469,23 +517,24 @@ def send_email_via_sendgrid(
                 response_body="",
                 error="Missing subject and/or recipients",
             )
-        return False
+        return False, False
 
     mode = _get_backend_mode()
     from_addr = _resolve_from_email(from_email)
 
     providers = ["smtp", "sendgrid"] if mode == "smtp" else ["sendgrid", "smtp"]
 
+    any_transient = False
     for provider in providers:
         if provider == "sendgrid":
-            ok, status, resp_body, err = _send_via_sendgrid_api(
+            ok, status, resp_body, err, transient = _send_via_sendgrid_api(
                 subject=subject,
                 to_emails=recipients,
                 plain_text=plain_text_content or "",
                 from_email=from_addr,
             )
         else:
-            ok, status, resp_body, err = _send_via_smtp(
+            ok, status, resp_body, err, transient = _send_via_smtp(
                 subject=subject,
                 to_emails=recipients,
                 plain_text=plain_text_content or "",
@@ -504,6 +553,7 @@ def send_email_via_sendgrid(
             )
 
         if ok:
-            return True
+            return True, False
+        any_transient = any_transient or transient
 
-    return False
+    return False, any_transient
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from accounts import views
+from accounts.ratelimit import client_ip, is_rate_limited, password_reset_limited
+
+_LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "ratelimit-tests"}}
+
+
+@override_settings(CACHES=_LOCMEM, RATELIMIT_RESET_PASSWORD_EMAIL="2/m", RATELIMIT_RESET_PASSWORD="3/m")
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def _post(self, email="doctor@example.com", **meta):
+        return self.factory.post("/accounts/password-reset/", {"email": email}, **meta)
+
+    def test_limit_within_window(self):
+        results = [is_rate_limited("grp", "key", "3/m") for _ in range(5)]
+        self.assertEqual(results, [False, False, False, True, True])
+
+    def test_window_rollover_resets_count(self):
+        with mock.patch("accounts.ratelimit.time.time", return_value=1_000_020.0):
+            self.assertFalse(is_rate_limited("grp", "key", "1/m"))
+            self.assertTrue(is_rate_limited("grp", "key", "1/m"))
+        with mock.patch("accounts.ratelimit.time.time", return_value=1_000_080.0):
+            self.assertFalse(is_rate_limited("grp", "key", "1/m"))
+
+    def test_invalid_rate_or_empty_key_never_limits(self):
+        for rate, key in (("", "key"), ("abc", "key"), ("5/x", "key"), ("1/m", "")):
+            with self.subTest(rate=rate, key=key):
+                self.assertFalse(any(is_rate_limited("grp", key, rate) for _ in range(3)))
+
+    def test_per_email_limit_across_ips(self):
+        results = [
+            password_reset_limited(self._post(REMOTE_ADDR=f"10.0.0.{i}"), "Doctor@Example.com")
+            for i in range(3)
+        ]
+        self.assertEqual(results, [False, False, True])
+        # Another address from the same IP is still allowed.
+        self.assertFalse(password_reset_limited(self._post(REMOTE_ADDR="10.0.0.9"), "other@example.com"))
+
+    def test_per_ip_limit_across_emails(self):
+        results = [
+            password_reset_limited(self._post(REMOTE_ADDR="10.0.0.1"), f"user{i}@example.com")
+            for i in range(4)
+        ]
+        self.assertEqual(results, [False, False, False, True])
+        self.assertFalse(password_reset_limited(self._post(REMOTE_ADDR="10.0.0.2"), "user9@example.com"))
+
+    def test_client_ip_prefers_x_real_ip(self):
+        request = self._post(REMOTE_ADDR="127.0.0.1", HTTP_X_REAL_IP="203.0.113.7")
+        self.assertEqual(client_ip(request), "203.0.113.7")
+
+    def test_client_ip_ignores_x_forwarded_for(self):
+        request = self._post(REMOTE_ADDR="198.51.100.4", HTTP_X_FORWARDED_FOR="203.0.113.7")
+        self.assertEqual(client_ip(request), "198.51.100.4")
+
+    def test_ip_limit_keys_on_x_real_ip(self):
+        # Behind nginx every request has the proxy's REMOTE_ADDR; clients are told apart by X-Real-IP.
+        for i in range(3):
+            request = self._post(REMOTE_ADDR="127.0.0.1", HTTP_X_REAL_IP="203.0.113.7")
+            self.assertFalse(password_reset_limited(request, f"user{i}@example.com"))
+        request = self._post(REMOTE_ADDR="127.0.0.1", HTTP_X_REAL_IP="203.0.113.8")
+        self.assertFalse(password_reset_limited(request, "user9@example.com"))
+
+    def test_limited_reset_has_no_side_effects(self):
+        request = self._post()
+        request.session = SessionBase()
+        request._messages = FallbackStorage(request)
+
+        with mock.patch.object(views, "password_reset_limited", return_value=True), mock.patch.object(
+            views, "resolve_master_doctor_identity"
+        ) as resolve:
+            response = views.request_password_reset(request)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn("prefill_login_email", request.session)
+        resolve.assert_not_called()
@@ -0,0 +1,55 @@
+from datetime import datetime
+from unittest import mock
+
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.test import SimpleTestCase, override_settings
+
+from accounts.models import User
+from accounts.tokens import DoctorPasswordTokenGenerator
+
+_NOW = datetime(2026, 1, 15, 10, 30, 0)
+
+
+def _user(**kwargs) -> User:
+    # Unsaved: the token only reads pk, password, last_login and email.
+    fields = {"pk": 42, "email": "doctor@example.com", "password": "pbkdf2_sha256$1$salt$hash"}
+    fields.update(kwargs)
+    return User(**fields)
+
+
+@mock.patch.object(PasswordResetTokenGenerator, "_now", return_value=_NOW)
+class DoctorPasswordTokenGeneratorTests(SimpleTestCase):
+    def test_matches_django_generator(self, _now):
+        for user in (_user(), _user(last_login=datetime(2025, 12, 1, 8, 0, 0, 123456))):
+            with self.subTest(last_login=user.last_login):
+                self.assertEqual(
+                    DoctorPasswordTokenGenerator().make_token(user),
+                    PasswordResetTokenGenerator().make_token(user),
+                )
+
+    def test_matches_django_generator_per_secret(self, _now):
+        user = _user()
+        for secret in ("first-secret", "second-secret"):
+            with self.subTest(secret=secret):
+                self.assertEqual(
+                    DoctorPasswordTokenGenerator()._make_token_with_timestamp(user, 12345, secret),
+                    PasswordResetTokenGenerator()._make_token_with_timestamp(user, 12345, secret),
+                )
+
+    def test_token_changes_with_password(self, _now):
+        gen = DoctorPasswordTokenGenerator()
+        token = gen.make_token(_user())
+        self.assertTrue(gen.check_token(_user(), token))
+        self.assertFalse(gen.check_token(_user(password="pbkdf2_sha256$1$salt$other"), token))
+
+    def test_valid_after_secret_key_rotation(self, _now):
+        user = _user()
+        with override_settings(SECRET_KEY="old-secret"):
+            token = DoctorPasswordTokenGenerator().make_token(user)
+
+        with override_settings(SECRET_KEY="new-secret", SECRET_KEY_FALLBACKS=["old-secret"]):
+            self.assertTrue(DoctorPasswordTokenGenerator().check_token(user, token))
+            self.assertTrue(PasswordResetTokenGenerator().check_token(user, token))
+
+        with override_settings(SECRET_KEY="new-secret", SECRET_KEY_FALLBACKS=[]):
+            self.assertFalse(DoctorPasswordTokenGenerator().check_token(user, token))
@@ -1,8 +1,36 @@
+import hashlib
+import hmac
+
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.utils.encoding import force_bytes
+from django.utils.http import int_to_base36
 
 
 class DoctorPasswordTokenGenerator(PasswordResetTokenGenerator):
-    """Token generator for doctor password setup/reset."""
+    """
+    Token generator for doctor password setup/reset.
+
+    Produces exactly the same tokens as Django's default generator (same key_salt/algorithm),
+    so links issued before this change stay valid. The HMAC keyed with the server secret is
+    built once per secret and copied for each token instead of being re-derived every call.
+    """
+
+    _hmac_prototypes: dict = {}
+
+    def _hmac_prototype(self, secret) -> "hmac.HMAC":
+        proto = self._hmac_prototypes.get((self.key_salt, self.algorithm, secret))
+        if proto is None:
+            hasher = getattr(hashlib, self.algorithm)
+            # Same key derivation as django.utils.crypto.salted_hmac()
+            key = hasher(force_bytes(self.key_salt) + force_bytes(secret)).digest()
+            proto = hmac.new(key, digestmod=hasher)
+            self._hmac_prototypes[(self.key_salt, self.algorithm, secret)] = proto
+        return proto
+
+    def _make_token_with_timestamp(self, user, timestamp, secret):
+        h = self._hmac_prototype(secret).copy()
+        h.update(force_bytes(self._make_hash_value(user, timestamp)))
+        return "%s-%s" % (int_to_base36(timestamp), h.hexdigest()[::2])
 
 
 doctor_password_token = DoctorPasswordTokenGenerator()
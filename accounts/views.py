@@ -1,34 +1,42 @@
 from __future__ import annotations
 
+import re
+
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.tokens import default_token_generator
-from django.db import transaction, connections
+from django.core.cache import cache
+from django.db import IntegrityError, transaction, connections
 from django.http import HttpResponseForbidden, HttpResponseServerError
 from django.shortcuts import redirect, render
 from django.urls import reverse
-from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_encode
 
 from .forms import DoctorRegistrationForm, DoctorClinicDetailsForm, EmailAuthenticationForm, DoctorSetPasswordForm
 from .pincode_directory import IndiaPincodeDirectoryNotReady, get_state_and_district_for_pincode, get_state_for_pincode
 
 from publisher.models import Campaign
+from publisher.signals import CAMPAIGN_EMAIL_TEMPLATE_CACHE_TTL, campaign_email_template_cache_key
 from . import master_db
 
 from .models import User, Clinic, DoctorProfile
+from .tokens import doctor_password_token
 
+from .email_queue import enqueue_email
 from .sendgrid_utils import send_email_via_sendgrid
+from .ratelimit import password_reset_limited
 
 from peds_edu.master_db import (
+    campaign_id_forms,
     resolve_master_doctor_auth,
     resolve_master_doctor_identity,
     get_stored_password_for_role,
     looks_like_hash,
     generate_temporary_password,
     update_master_password,
+    fetch_master_doctor_row_by_id,
+    master_cursor,
+    verify_password,
 )
 
 
@@ -41,8 +49,19 @@ def _build_absolute_url(path: str) -> str:
     return f"{base}{path}"
 
 
+# Placeholders understood by _send_doctor_links_email (same set as the field-rep WhatsApp renderer).
+_DOCTOR_LINKS_PLACEHOLDER_RE = re.compile(
+    r"<(?:doctor\.user\.full_name|doctor_name|doctor_id|username|email|login_link|temp_password|password"
+    r"|clinic_link|LinkShare|setup_link|LinkPW)>"
+    r"|\{\{(?:doctor_name|doctor_id|username|email|login_link|temp_password|password|clinic_link|setup_link)\}\}"
+)
+
+
 def _send_doctor_links_email(doctor: DoctorProfile, campaign_id: str | None = None, password_setup: bool = True) -> bool:
-    """Send doctor/staff share link + (optional) password setup/reset link, using campaign email template if present."""
+    """
+    Queue doctor/staff share link + (optional) password setup/reset link, using campaign email template if present.
+    Returns True once queued. No credentials change here, so a lost mail can simply be requested again.
+    """
     if not doctor or not doctor.user:
         return False
 
@@ -51,8 +70,8 @@ def _send_doctor_links_email(doctor: DoctorProfile, campaign_id: str | None = No
 
     setup_link = ""
     if password_setup:
-        token = default_token_generator.make_token(doctor.user)
-        uid = urlsafe_base64_encode(force_bytes(doctor.user.pk))
+        token = doctor_password_token.make_token(doctor.user)
+        uid = doctor.user.uidb64
         setup_link = _build_absolute_url(reverse("accounts:password_reset", args=[uid, token]))
 
     # Default fallback text (in case campaign template missing)
@@ -70,14 +89,7 @@ def _send_doctor_links_email(doctor: DoctorProfile, campaign_id: str | None = No
     fallback_lines.append("Thank you.")
     fallback_body = "\n".join(fallback_lines)
 
-    template_text = ""
-    if campaign_id:
-        template_text = (
-            Campaign.objects.filter(campaign_id=campaign_id)
-            .values_list("email_registration", flat=True)
-            .first()
-            or ""
-        )
+    template_text = _get_campaign_registration_template(campaign_id) if campaign_id else ""
 
     if template_text.strip():
         # Reuse the same placeholder strategy as the field-rep WhatsApp renderer.
@@ -112,16 +124,14 @@ def _send_doctor_links_email(doctor: DoctorProfile, campaign_id: str | None = No
                 "{{setup_link}}": setup_link,
                 "<LinkPW>": setup_link,
             }
-            for k, v in replacements.items():
-                # Replace even if v is empty (so placeholders disappear)
-                text = text.replace(k, v or "")
-            return text
+            # One pass; placeholders with empty values disappear
+            return _DOCTOR_LINKS_PLACEHOLDER_RE.sub(lambda m: replacements[m.group(0)] or "", text)
 
         body = _render(template_text).strip()
     else:
         body = fallback_body
 
-    return send_email_via_sendgrid(
+    return enqueue_email(
         subject="CPD in Clinic portal access",
         to_emails=[doctor.user.email],
         plain_text_content=body,
@@ -141,10 +151,18 @@ def _pop_registration_draft(request, session_key: str) -> dict | None:
     return draft
 
 
-def _master_auth_ok(email: str, raw_password: str) -> bool:
-    """Return True if the given email/password authenticates against master DB."""
+def _master_password_ok(*, doctor_id: str, role: str, raw_password: str, cursor=None) -> bool:
+    """
+    Return True if the password stored for doctor_id/role verifies against raw_password.
+
+    Reads the row by primary key and runs a single verify, instead of a full
+    email -> identity -> role resolution through resolve_master_doctor_auth().
+    """
     try:
-        return bool(resolve_master_doctor_auth(email, raw_password))
+        row = fetch_master_doctor_row_by_id(doctor_id, cursor=cursor)
+        if not row:
+            return False
+        return verify_password(raw_password, get_stored_password_for_role(row, role))
     except Exception:
         return False
 
@@ -169,7 +187,7 @@ def _force_set_master_password_plaintext(*, doctor_id: str, role: str, new_raw_p
     try:
         with connections[alias].cursor() as cursor:
             cursor.execute(
-                f"UPDATE `{table}` SET `{pwd_col}`=%s WHERE `{doctor_id_col}`=%s LIMIT 1",
+                f"UPDATE `{table}` SET `{pwd_col}`=%s WHERE `{doctor_id_col}`=%s",
                 [new_raw_password, doctor_id],
             )
         return True
@@ -183,7 +201,6 @@ def _force_set_master_password_plaintext(*, doctor_id: str, role: str, new_raw_p
 
 import json
 import logging
-import re
 import time
 import uuid
 
@@ -469,16 +486,16 @@ def register_doctor(request):
                     )
 
             try:
-                sent = _send_doctor_links_email(
+                queued = _send_doctor_links_email(
                     doctor,
                     campaign_id=campaign_id or None,
                     password_setup=True,
                 )
                 _log(
-                    "doctor_register.email_sent_existing",
+                    "doctor_register.email_queued_existing",
                     request_id=request_id,
                     doctor_id=existing_doctor_id,
-                    sent=bool(sent),
+                    queued=bool(queued),
                 )
             except Exception:
                 _log_exception(
@@ -582,22 +599,16 @@ def register_doctor(request):
 
         # Verify that the password we just stored in master DB actually works for login.
         # If it doesn't (rare; usually due to unexpected master DB schema/data), force-reset it.
-        if email and temp_password and not _master_auth_ok(email, temp_password):
-            try:
-                update_master_password(
-                    doctor_id=doctor_id,
-                    role="doctor",
-                    new_raw_password=temp_password,
-                )
-            except Exception:
-                pass
-
-            if email and temp_password and not _master_auth_ok(email, temp_password):
-                _force_set_master_password_plaintext(
-                    doctor_id=doctor_id,
-                    role="doctor",
-                    new_raw_password=temp_password,
-                )
+        if email and temp_password and not _master_password_ok(
+            doctor_id=doctor_id,
+            role="doctor",
+            raw_password=temp_password,
+        ):
+            _force_set_master_password_plaintext(
+                doctor_id=doctor_id,
+                role="doctor",
+                new_raw_password=temp_password,
+            )
 
         try:
             ok = _send_master_doctor_access_email(
@@ -748,53 +759,57 @@ def modify_clinic_details(request, doctor_id: str):
             },
         )
 
-    # Enforce uniqueness (excluding current doctor/user)
-    if User.objects.filter(email=email).exclude(pk=doctor.user.pk).exists():
-        form.add_error("email", "This email address is already registered.")
-        return render(request, "accounts/register.html", {"form": form, "mode": "modify"})
-
+    # Email uniqueness is enforced by the unique index on User.email (see the update below).
     if DoctorProfile.objects.filter(whatsapp_number=whatsapp_number).exclude(pk=doctor.pk).exists():
         form.add_error("whatsapp_number", "This WhatsApp number is already registered.")
         return render(request, "accounts/register.html", {"form": form, "mode": "modify"})
 
     clinic_display_name = f"Dr. {full_name}" if full_name else ""
 
-    with transaction.atomic():
-        # Update user
-        doctor.user.full_name = full_name
-        doctor.user.email = email
-        doctor.user.save(update_fields=["full_name", "email"])
-
-        # Update clinic
-        if doctor.clinic:
-            doctor.clinic.display_name = clinic_display_name
-            doctor.clinic.clinic_phone = clinic_number
-            doctor.clinic.clinic_whatsapp_number = clinic_whatsapp_number
-            doctor.clinic.address_text = address_text
-            doctor.clinic.postal_code = postal_code
-            doctor.clinic.state = state
-            doctor.clinic.district = district
-            doctor.clinic.save(
-                update_fields=[
-                    "display_name",
-                    "clinic_phone",
-                    "clinic_whatsapp_number",
-                    "address_text",
-                    "postal_code",
-                    "state",
-                    "district"
-                ]
-            )
+    saving_user = True
+    try:
+        with transaction.atomic():
+            # Update user
+            doctor.user.full_name = full_name
+            doctor.user.email = email
+            doctor.user.save(update_fields=["full_name", "email"])
+            saving_user = False
+
+            # Update clinic
+            if doctor.clinic:
+                doctor.clinic.display_name = clinic_display_name
+                doctor.clinic.clinic_phone = clinic_number
+                doctor.clinic.clinic_whatsapp_number = clinic_whatsapp_number
+                doctor.clinic.address_text = address_text
+                doctor.clinic.postal_code = postal_code
+                doctor.clinic.state = state
+                doctor.clinic.district = district
+                doctor.clinic.save(
+                    update_fields=[
+                        "display_name",
+                        "clinic_phone",
+                        "clinic_whatsapp_number",
+                        "address_text",
+                        "postal_code",
+                        "state",
+                        "district"
+                    ]
+                )
 
-        # Update doctor profile
-        doctor.whatsapp_number = whatsapp_number
-        doctor.imc_number = imc_number
-        doctor.postal_code = postal_code
-        if new_photo:
-            doctor.photo = new_photo
-            doctor.save(update_fields=["whatsapp_number", "imc_number", "postal_code", "photo"])
-        else:
-            doctor.save(update_fields=["whatsapp_number", "imc_number", "postal_code"])
+            # Update doctor profile
+            doctor.whatsapp_number = whatsapp_number
+            doctor.imc_number = imc_number
+            doctor.postal_code = postal_code
+            if new_photo:
+                doctor.photo = new_photo
+                doctor.save(update_fields=["whatsapp_number", "imc_number", "postal_code", "photo"])
+            else:
+                doctor.save(update_fields=["whatsapp_number", "imc_number", "postal_code"])
+    except IntegrityError:
+        if not saving_user:
+            raise
+        form.add_error("email", "This email address is already registered.")
+        return render(request, "accounts/register.html", {"form": form, "mode": "modify"})
 
     messages.success(request, "Clinic details updated.")
     return redirect("sharing:doctor_share", doctor_id=doctor_id)
@@ -836,9 +851,13 @@ def doctor_login(request):
                 login(request, user, backend="django.contrib.auth.backends.ModelBackend")
 
                 # Store doctor_id in session for authorization in doctor_share
-                request.session["master_doctor_id"] = master_auth.doctor_id
-                request.session["master_login_email"] = master_auth.login_email
-                request.session["master_login_role"] = master_auth.role
+                request.session.update(
+                    {
+                        "master_doctor_id": master_auth.doctor_id,
+                        "master_login_email": master_auth.login_email,
+                        "master_login_role": master_auth.role,
+                    }
+                )
 
                 return redirect("sharing:doctor_share", doctor_id=master_auth.doctor_id)
 
@@ -878,22 +897,20 @@ def doctor_login(request):
 
 @login_required
 def doctor_logout(request):
-    # logout() flushes the session; this is just explicit
-    for k in ["master_doctor_id", "master_login_email", "master_login_role"]:
-        try:
-            request.session.pop(k, None)
-        except Exception:
-            pass
-
+    # logout() flushes the session, including the master_* keys set at login
     logout(request)
     messages.info(request, "Logged out.")
     return redirect("accounts:login")
 
 
 
+# Columns read by the reset-link flow: the token hash uses pk/password/last_login/email.
+_RESET_USER_FIELDS = ("pk", "email", "full_name", "password", "last_login")
+
+
 def _send_password_reset_email(user: User) -> bool:
-    token = default_token_generator.make_token(user)
-    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    token = doctor_password_token.make_token(user)
+    uid = user.uidb64
     reset_link = _build_absolute_url(reverse("accounts:password_reset", args=[uid, token]))
 
     body_lines = [
@@ -930,6 +947,15 @@ def request_password_reset(request):
     if request.method == "POST":
         email = (request.POST.get("email") or "").strip().lower()
 
+        # Throttled requests get the same generic response before any side effect
+        # (session write, DB lookup, SendGrid call).
+        if password_reset_limited(request, email):
+            messages.success(
+                request,
+                "If the email exists in our system, an email has been sent.",
+            )
+            return redirect("accounts:login")
+
         # Prefill login form after redirect back to /accounts/login/
         if email:
             try:
@@ -958,35 +984,37 @@ def request_password_reset(request):
             else:
                 # Reset to a temporary password and update the master DB hash
                 tmp = generate_temporary_password(length=10)
+                verified = False
                 try:
-                    update_master_password(
-                        doctor_id=ident.doctor_id,
-                        role=ident.role,
-                        new_raw_password=tmp,
-                    )
-                    password_to_send = tmp
-                except Exception:
-                    # If we cannot update the master DB, do not expose details.
-                    password_to_send = None
-
-                # Safety net: ensure the new password actually authenticates.
-                # If hash verification fails unexpectedly, fall back to plaintext storage.
-                if password_to_send and not _master_auth_ok(email, password_to_send):
-                    try:
+                    # One master cursor for the update and the read-back check.
+                    with master_cursor() as mcur:
                         update_master_password(
                             doctor_id=ident.doctor_id,
                             role=ident.role,
-                            new_raw_password=password_to_send,
+                            new_raw_password=tmp,
+                            cursor=mcur,
                         )
-                    except Exception:
-                        pass
+                        password_to_send = tmp
 
-                    if not _master_auth_ok(email, password_to_send):
-                        _force_set_master_password_plaintext(
+                        # Safety net: ensure the stored hash actually verifies (one check against
+                        # the freshly written row).
+                        verified = _master_password_ok(
                             doctor_id=ident.doctor_id,
                             role=ident.role,
-                            new_raw_password=password_to_send,
+                            raw_password=tmp,
+                            cursor=mcur,
                         )
+                except Exception:
+                    # If we cannot update the master DB, do not expose details.
+                    pass
+
+                # If the hash does not verify, fall back to plaintext storage.
+                if password_to_send and not verified:
+                    _force_set_master_password_plaintext(
+                        doctor_id=ident.doctor_id,
+                        role=ident.role,
+                        new_raw_password=password_to_send,
+                    )
 
             if password_to_send:
                 body_lines = [
@@ -1003,6 +1031,8 @@ def request_password_reset(request):
                     "",
                     "Thank you.",
                 ]
+                # Sent inline, not queued: the master password has already been replaced,
+                # so a mail lost with a recycled worker would lock the user out.
                 send_email_via_sendgrid(
                     subject=email_subject,
                     to_emails=[email],
@@ -1017,7 +1047,7 @@ def request_password_reset(request):
             return redirect("accounts:login")
 
         # 2) Fallback: existing portal user reset-link (publisher/staff)
-        user = User.objects.filter(email=email).first()
+        user = User.objects.only(*_RESET_USER_FIELDS).filter(email=email).first()
         if user:
             _send_password_reset_email(user)
 
@@ -1036,11 +1066,11 @@ def password_reset(request, uidb64: str, token: str):
     try:
         from django.utils.http import urlsafe_base64_decode
         uid = urlsafe_base64_decode(uidb64).decode()
-        user = User.objects.get(pk=uid)
+        user = User.objects.only(*_RESET_USER_FIELDS).get(pk=uid)
     except Exception:
         user = None
 
-    if not user or not default_token_generator.check_token(user, token):
+    if not user or not doctor_password_token.check_token(user, token):
         messages.error(request, "Invalid or expired password reset link.")
         return redirect("accounts:login")
 
@@ -1055,6 +1085,48 @@ def password_reset(request, uidb64: str, token: str):
 
     return render(request, "accounts/password_reset.html", {"form": form})
 
+# Placeholders understood in campaign registration templates (master-DB signup email).
+# The regex only matches these exact tokens, so every match has an entry in `replacements`.
+_MASTER_ACCESS_PLACEHOLDER_RE = re.compile(
+    r"\{\{(?:doctor_name|doctor_id|username|email|temp_password|password|login_link|clinic_link)\}\}"
+    r"|<(?:doctor_name|doctor_id|clinic_link|LinkShare)>"
+)
+
+
+def _get_campaign_registration_template(campaign_id: str) -> str:
+    """
+    Campaign.email_registration for a campaign_id stored with or without dashes.
+    Cached (including misses) until the campaign is saved; see publisher/signals.py.
+    """
+    key = campaign_email_template_cache_key(campaign_id)
+    try:
+        cached = cache.get(key)
+    except Exception:
+        cached = None
+    if cached is not None:
+        return cached
+
+    try:
+        # As given, plus the dashless / hyphenated spellings publisher_campaign may hold.
+        cid_raw = (campaign_id or "").strip()
+        variants = list(dict.fromkeys([cid_raw, *campaign_id_forms([cid_raw])]))
+        qs = (
+            Campaign.objects.filter(campaign_id=variants[0])
+            if len(variants) == 1
+            else Campaign.objects.filter(campaign_id__in=variants)
+        )
+        template_text = (qs.values_list("email_registration", flat=True).first() or "").strip()
+    except Exception:
+        # Do not cache lookup failures
+        return ""
+
+    try:
+        cache.set(key, template_text, CAMPAIGN_EMAIL_TEMPLATE_CACHE_TTL)
+    except Exception:
+        pass
+    return template_text
+
+
 def _send_master_doctor_access_email(
     *,
     doctor_id: str,
@@ -1070,27 +1142,7 @@ def _send_master_doctor_access_email(
     clinic_link = _build_absolute_url(reverse("sharing:doctor_share", args=[doctor_id]))
     login_link = _build_absolute_url(reverse("accounts:login"))
 
-    def _hyphenate_uuid32(s: str) -> str:
-        t = (s or "").strip().replace("-", "")
-        if len(t) != 32:
-            return s
-        return f"{t[0:8]}-{t[8:12]}-{t[12:16]}-{t[16:20]}-{t[20:32]}"
-
-    template_text = ""
-    if campaign_id:
-        try:
-            cid_raw = (campaign_id or "").strip()
-            cid_norm = cid_raw.replace("-", "")
-            cid_h = _hyphenate_uuid32(cid_raw)
-
-            template_text = (
-                Campaign.objects.filter(campaign_id__in=[cid_raw, cid_norm, cid_h])
-                .values_list("email_registration", flat=True)
-                .first()
-                or ""
-            ).strip()
-        except Exception:
-            template_text = ""
+    template_text = _get_campaign_registration_template(campaign_id) if campaign_id else ""
 
     if template_text:
         replacements = {
@@ -1108,9 +1160,7 @@ def _send_master_doctor_access_email(
             "<LinkShare>": clinic_link,
         }
 
-        body = template_text
-        for k, v in replacements.items():
-            body = body.replace(k, v)
+        body = _MASTER_ACCESS_PLACEHOLDER_RE.sub(lambda m: replacements[m.group(0)], template_text)
 
         body = body.strip() + "\n"
     else:
@@ -1,4 +1,5 @@
 from django.core.cache import cache
+from django.db import transaction
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
@@ -8,16 +9,19 @@ from .models import (
     TriggerCluster,
     Video,
     VideoCluster,
+    VideoClusterLanguage,
     VideoClusterVideo,
+    VideoLanguage,
     VideoTriggerMap,
 )
 
 # IMPORTANT:
-# Share page uses clinic_catalog_payload_v6 (previously v5).
-# Old signal only deleted catalog_json_v1, causing stale payloads.
+# Share page uses clinic_catalog_payload_v7 (sharing.services._CATALOG_CACHE_KEY; previously v5/v6).
+# Keep this list in sync whenever that key is bumped, otherwise edits leave stale payloads.
 CATALOG_CACHE_KEYS = [
     "clinic_catalog_payload_v5",
     "clinic_catalog_payload_v6",
+    "clinic_catalog_payload_v7",
 ]
 
 
@@ -47,5 +51,10 @@ def clear_catalog_cache() -> None:
 @receiver(post_delete, sender=VideoClusterVideo)
 @receiver(post_save, sender=VideoTriggerMap)
 @receiver(post_delete, sender=VideoTriggerMap)
+@receiver(post_save, sender=VideoLanguage)
+@receiver(post_delete, sender=VideoLanguage)
+@receiver(post_save, sender=VideoClusterLanguage)
+@receiver(post_delete, sender=VideoClusterLanguage)
 def _on_catalog_change(*args, **kwargs):
-    clear_catalog_cache()
+    # Clear after commit so a concurrent share-page request cannot re-cache pre-commit rows.
+    transaction.on_commit(clear_catalog_cache)
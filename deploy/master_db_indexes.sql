@@ -0,0 +1,20 @@
+-- Indexes used by the portal's lookups against the MASTER DB (peds_edu/master_db.py).
+-- Run once against the master schema; names are stable so re-runs fail harmlessly with "Duplicate key name".
+-- Columns follow the default MASTER_DOCTOR_FIELD_MAP; adjust if the map is overridden.
+
+-- fetch_master_doctor_row_by_email(): one seek per email column (UNION ALL branches).
+-- The lookups compare LOWER(col) = %s, so these are functional indexes (MySQL 8.0.13+).
+CREATE INDEX redflags_doctor_email_idx ON redflags_doctor ((LOWER(email)));
+CREATE INDEX redflags_doctor_user1_email_idx ON redflags_doctor ((LOWER(clinic_user1_email)));
+CREATE INDEX redflags_doctor_user2_email_idx ON redflags_doctor ((LOWER(clinic_user2_email)));
+
+-- fetch_pe_campaign_support_for_doctor_email(): campaign_doctor lookups by email / last-10 phone digits.
+-- phone_last10 is picked up automatically once it exists (otherwise RIGHT(phone, 10) is used).
+CREATE INDEX campaign_doctor_email_idx ON campaign_doctor ((LOWER(email)));
+ALTER TABLE campaign_doctor
+    ADD COLUMN phone_last10 CHAR(10) AS (RIGHT(phone, 10)) STORED,
+    ADD INDEX campaign_doctor_phone_last10_idx (phone_last10);
+
+-- fetch_pe_campaign_support_for_doctor_email(): PE campaigns in display order (c.system_pe = 1
+-- ORDER BY start_date DESC, created_at DESC). Descending key parts need MySQL 8.0+.
+CREATE INDEX campaign_campaign_pe_start_idx ON campaign_campaign (system_pe, start_date DESC, created_at DESC);
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import base64
+import logging
 import os
-from functools import lru_cache
-from typing import Optional
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 
 try:
     import boto3
+    from botocore.config import Config as BotoConfig
     from botocore.exceptions import (
         BotoCoreError,
         ClientError,
@@ -17,8 +20,9 @@ try:
     )
 except Exception as e:  # pragma: no cover
     # Keep this extremely lightweight; do not crash import-time.
-    print("[DEBUG] boto3 import failed:", repr(e))
+    logging.getLogger(__name__).warning("boto3 import failed: %r", e)
     boto3 = None  # type: ignore
+    BotoConfig = None  # type: ignore
     BotoCoreError = Exception  # type: ignore
     ClientError = Exception  # type: ignore
     EndpointConnectionError = Exception  # type: ignore
@@ -29,10 +33,45 @@ except Exception as e:  # pragma: no cover
 
 _LAST_ERROR: str = ""
 
+logger = logging.getLogger(__name__)
+
+# Enable with DEBUG_AWS_SECRETS=1 (read once at import; the root handler prints DEBUG records).
+if os.getenv("DEBUG_AWS_SECRETS", "0") == "1":
+    logger.setLevel(logging.DEBUG)
+
 
 def _debug_enabled() -> bool:
-    # Enable with DEBUG_AWS_SECRETS=1
-    return os.getenv("DEBUG_AWS_SECRETS", "0") == "1"
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+# One Secrets Manager client per region for the whole process. boto3 clients are thread-safe;
+# building a session/client loads botocore models and the credential chain, which is slow.
+_CLIENTS: Dict[str, Any] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _get_client(region_name: str):
+    client = _CLIENTS.get(region_name)
+    if client is not None:
+        return client
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(region_name)
+        if client is None:
+            if _debug_enabled():
+                logger.debug("Creating Secrets Manager client | region=%s", region_name)
+            config = None
+            if BotoConfig is not None:
+                config = BotoConfig(
+                    max_pool_connections=20,
+                    retries={"max_attempts": 3, "mode": "adaptive"},
+                )
+            client = boto3.session.Session().client(
+                service_name="secretsmanager",
+                region_name=region_name,
+                config=config,
+            )
+            _CLIENTS[region_name] = client
+    return client
 
 
 def get_last_error() -> str:
@@ -40,10 +79,9 @@ def get_last_error() -> str:
     return _LAST_ERROR
 
 
-@lru_cache(maxsize=32)
-def get_secret_string(secret_name: str, region_name: str = "ap-south-1") -> Optional[str]:
+def fetch_secret_string_uncached(secret_name: str, region_name: str = "ap-south-1") -> Optional[str]:
     """
-    Fetch a secret string from AWS Secrets Manager.
+    Fetch a secret string from AWS Secrets Manager (no caching).
 
     Best-effort: never raises.
     """
@@ -51,25 +89,19 @@ def get_secret_string(secret_name: str, region_name: str = "ap-south-1") -> Opti
     _LAST_ERROR = ""
 
     if _debug_enabled():
-        print(f"[DEBUG] get_secret_string called | secret_name={secret_name} | region={region_name}")
+        logger.debug("get_secret_string called | secret_name=%s | region=%s", secret_name, region_name)
 
     if boto3 is None:
         _LAST_ERROR = "boto3_unavailable"
         if _debug_enabled():
-            print("[DEBUG] boto3 unavailable")
+            logger.debug("boto3 unavailable")
         return None
 
     try:
-        if _debug_enabled():
-            print("[DEBUG] Creating boto3 session")
-        session = boto3.session.Session()
-
-        if _debug_enabled():
-            print("[DEBUG] Creating Secrets Manager client")
-        client = session.client(service_name="secretsmanager", region_name=region_name)
+        client = _get_client(region_name)
 
         if _debug_enabled():
-            print("[DEBUG] Calling get_secret_value")
+            logger.debug("Calling get_secret_value")
         response = client.get_secret_value(SecretId=secret_name)
 
     except (
@@ -82,37 +114,73 @@ def get_secret_string(secret_name: str, region_name: str = "ap-south-1") -> Opti
     ) as e:
         _LAST_ERROR = f"{type(e).__name__}: {e}"
         if _debug_enabled():
-            print("[DEBUG] AWS error while fetching secret")
-            print("[DEBUG] Error:", _LAST_ERROR)
+            logger.debug("AWS error while fetching secret")
+            logger.debug("Error: %s", _LAST_ERROR)
         return None
 
     except Exception as e:
         _LAST_ERROR = f"{type(e).__name__}: {e}"
         if _debug_enabled():
-            print("[DEBUG] Unexpected error while fetching secret")
-            print("[DEBUG] Error:", _LAST_ERROR)
+            logger.debug("Unexpected error while fetching secret")
+            logger.debug("Error: %s", _LAST_ERROR)
         return None
 
     if isinstance(response, dict) and response.get("SecretString"):
         if _debug_enabled():
-            print("[DEBUG] SecretString returned")
+            logger.debug("SecretString returned")
         return str(response["SecretString"]).strip()
 
     if isinstance(response, dict) and response.get("SecretBinary"):
         if _debug_enabled():
-            print("[DEBUG] SecretBinary returned, attempting base64 decode")
+            logger.debug("SecretBinary returned, attempting base64 decode")
         try:
             decoded = base64.b64decode(response["SecretBinary"]).decode("utf-8").strip()
             if _debug_enabled():
-                print("[DEBUG] SecretBinary decoded successfully")
+                logger.debug("SecretBinary decoded successfully")
             return decoded
         except Exception as e:
             _LAST_ERROR = f"decode_error:{type(e).__name__}: {e}"
             if _debug_enabled():
-                print("[DEBUG] Failed to decode SecretBinary")
-                print("[DEBUG] Error:", _LAST_ERROR)
+                logger.debug("Failed to decode SecretBinary")
+                logger.debug("Error: %s", _LAST_ERROR)
             return None
 
     if _debug_enabled():
-        print("[DEBUG] No SecretString or SecretBinary found in response")
+        logger.debug("No SecretString or SecretBinary found in response")
     return None
+
+
+# (secret_name, region) -> (fetched_at monotonic, value). Only successful reads are cached,
+# and entries expire so rotated secrets are picked up without a restart.
+DEFAULT_SECRET_TTL_SECONDS = 900
+_SECRET_CACHE: Dict[Tuple[str, str], Tuple[float, str]] = {}
+_SECRET_CACHE_LOCK = threading.Lock()
+
+
+def get_secret_string(
+    secret_name: str,
+    region_name: str = "ap-south-1",
+    ttl_seconds: float = DEFAULT_SECRET_TTL_SECONDS,
+) -> Optional[str]:
+    """
+    Fetch a secret string from AWS Secrets Manager, cached per process for `ttl_seconds`.
+
+    Best-effort: never raises.
+    """
+    key = (secret_name, region_name)
+    now = time.monotonic()
+    with _SECRET_CACHE_LOCK:
+        hit = _SECRET_CACHE.get(key)
+    if hit is not None and now - hit[0] < ttl_seconds:
+        return hit[1]
+
+    value = fetch_secret_string_uncached(secret_name, region_name=region_name)
+    if value is not None:
+        with _SECRET_CACHE_LOCK:
+            _SECRET_CACHE[key] = (now, value)
+    return value
+
+
+def clear_secret_cache() -> None:
+    with _SECRET_CACHE_LOCK:
+        _SECRET_CACHE.clear()
@@ -1,39 +1,29 @@
 from __future__ import annotations
 
+import hmac
 import re
 import secrets
+import uuid
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, Literal, Optional, Tuple, List
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Mapping, Optional, Tuple
 
 from django.conf import settings
-from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.contrib.auth.hashers import check_password, get_hasher, get_hashers, make_password
 from django.core import signing
+from django.core.cache import cache
+from django.core.signals import setting_changed
 from django.db import connections
+from django.dispatch import receiver
+from django.utils.crypto import salted_hmac
 
-
-def _get_banner_target_url_from_local_publisher_campaign(campaign_id: str) -> Optional[str]:
-    cid = (campaign_id or "").strip().replace("-", "")
-    if not cid:
-        return None
-
-    try:
-        with connections["default"].cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT banner_target_url
-                FROM publisher_campaign
-                WHERE REPLACE(campaign_id, '-', '') = %s
-                LIMIT 1
-                """,
-                [cid],
-            )
-            row = cursor.fetchone()
-        if row and row[0]:
-            return str(row[0]).strip()
-    except Exception:
-        return None
-
-    return None
+try:
+    import bcrypt  # type: ignore
+except Exception:  # pragma: no cover
+    # Optional: raw "$2..." hashes in the master DB are only verifiable when bcrypt is installed.
+    bcrypt = None  # type: ignore
 
 
 @dataclass(frozen=True)
@@ -44,117 +34,310 @@ class MasterDoctorAuthResult:
     role: Literal["doctor", "clinic_user1", "clinic_user2"]
     display_name: str       # name to show in portal header/session (doctor or staff)
     doctor_full_name: str   # doctor's name for patient-facing messaging
-    row: Dict[str, Any]     # raw DB row dict (all columns)
+    row: Dict[str, Any]     # raw DB row dict (identity/password columns, see _AUTH_FIELDS)
+
 
+# \Z rather than $: "$" would also accept a trailing newline.
+_IDENT_RE = re.compile(r"^[A-Za-z0-9_]+\Z")
 
+
+@lru_cache(maxsize=128)
 def _safe_identifier(name: str) -> str:
     """
     Validate SQL identifier (table/column) to reduce injection risk.
     Only allows letters, numbers, underscore.
     """
-    if not re.match(r"^[A-Za-z0-9_]+$", name or ""):
+    if not _IDENT_RE.match(name or ""):
         raise ValueError(f"Unsafe SQL identifier: {name!r}")
     return name
 
 
+# Settings do not change at runtime, so the alias/table/field map are computed once per process.
+@lru_cache(maxsize=1)
 def _master_alias() -> str:
     return getattr(settings, "MASTER_DB_ALIAS", "master")
 
 
+@lru_cache(maxsize=1)
 def _doctor_table() -> str:
     return _safe_identifier(getattr(settings, "MASTER_DOCTOR_TABLE", "redflags_doctor"))
 
 
-def _field_map() -> Dict[str, str]:
-    """
-    Column mapping (logical -> physical column name).
-    Override any/all via settings.MASTER_DOCTOR_FIELD_MAP.
-    """
-    default = {
-        # identity / names
-        "doctor_id": "doctor_id",
-        "first_name": "first_name",
-        "last_name": "last_name",
-        "email": "email",
-        "whatsapp_no": "whatsapp_no",
-
-        # clinic display
-        "clinic_name": "clinic_name",
-        "clinic_phone": "clinic_phone",
-        "clinic_whatsapp": "receptionist_whatsapp_number",
-        "clinic_address": "clinic_address",
-        "state": "state",
-        "postal_code": "postal_code",
-
-        # regulatory
-        "imc_number": "imc_registration_number",
-
-        # password fields
-        "doctor_password": "clinic_password_hash",
-        "user1_email": "clinic_user1_email",
-        "user1_name": "clinic_user1_name",
-        "user1_password": "clinic_user1_password_hash",
-        "user2_email": "clinic_user2_email",
-        "user2_name": "clinic_user2_name",
-        "user2_password": "clinic_user2_password_hash",
-
-        # optional timestamp for password set events
-        "doctor_password_set_at": "clinic_password_set_at",
-    }
+# Column mapping (logical -> physical column name). All values are known-safe identifiers.
+# Read-only, so _field_map() can hand it out as-is when there is no override.
+_DEFAULT_FIELD_MAP: Mapping[str, str] = MappingProxyType({
+    # identity / names
+    "doctor_id": "doctor_id",
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "email": "email",
+    "whatsapp_no": "whatsapp_no",
+
+    # clinic display
+    "clinic_name": "clinic_name",
+    "clinic_phone": "clinic_phone",
+    "clinic_whatsapp": "receptionist_whatsapp_number",
+    "clinic_address": "clinic_address",
+    "state": "state",
+    "postal_code": "postal_code",
+
+    # regulatory
+    "imc_number": "imc_registration_number",
+
+    # password fields
+    "doctor_password": "clinic_password_hash",
+    "user1_email": "clinic_user1_email",
+    "user1_name": "clinic_user1_name",
+    "user1_password": "clinic_user1_password_hash",
+    "user2_email": "clinic_user2_email",
+    "user2_name": "clinic_user2_name",
+    "user2_password": "clinic_user2_password_hash",
+
+    # optional timestamp for password set events
+    "doctor_password_set_at": "clinic_password_set_at",
+})
+
+
+@lru_cache(maxsize=1)
+def _field_map() -> Mapping[str, str]:
+    """
+    Column mapping (logical -> physical column name), read-only.
+    Override any/all via settings.MASTER_DOCTOR_FIELD_MAP; only the overridden values are validated.
+    """
     override = getattr(settings, "MASTER_DOCTOR_FIELD_MAP", None)
-    if isinstance(override, dict):
-        default.update({k: str(v) for k, v in override.items() if v})
+    if not isinstance(override, dict) or not any(override.values()):
+        return _DEFAULT_FIELD_MAP
+    fm = dict(_DEFAULT_FIELD_MAP)
+    fm.update({k: _safe_identifier(str(v)) for k, v in override.items() if v})
+    return MappingProxyType(fm)
+
+
+@lru_cache(maxsize=1)
+def _doctor_col_names() -> Tuple[str, ...]:
+    """Physical doctor columns we read, in SELECT order (distinct values of the field map)."""
+    return tuple(dict.fromkeys(_field_map().values()))
+
+
+@lru_cache(maxsize=1)
+def _doctor_select_cols() -> str:
+    """Backticked column list for the mapped doctor columns (SELECT projection instead of *)."""
+    return ", ".join(f"`{c}`" for c in _doctor_col_names())
+
+
+# Logical fields the email -> identity/auth path reads (resolve_master_doctor_identity,
+# get_stored_password_for_role). Clinic/display columns are only needed by the by-id fetch.
+_AUTH_FIELDS = (
+    "doctor_id",
+    "first_name",
+    "last_name",
+    "email",
+    "user1_email",
+    "user1_name",
+    "user2_email",
+    "user2_name",
+    "doctor_password",
+    "user1_password",
+    "user2_password",
+)
+
+
+@lru_cache(maxsize=1)
+def _auth_col_names() -> Tuple[str, ...]:
+    fm = _field_map()
+    return tuple(dict.fromkeys(fm[k] for k in _AUTH_FIELDS))
+
+
+@receiver(setting_changed)
+def _clear_settings_caches(*, setting, **kwargs) -> None:
+    # Keeps override_settings() working for the memoized helpers above.
+    if setting in ("MASTER_DB_ALIAS", "MASTER_DOCTOR_TABLE", "MASTER_DOCTOR_FIELD_MAP", "DATABASES"):
+        _master_alias.cache_clear()
+        _master_db_name.cache_clear()
+        _schema_cache_clear()
+        _doctor_table.cache_clear()
+        _field_map.cache_clear()
+        _doctor_col_names.cache_clear()
+        _doctor_select_cols.cache_clear()
+        _auth_col_names.cache_clear()
+        _sql_fetch_by_id.cache_clear()
+        _sql_fetch_by_email.cache_clear()
+        _sql_update_password.cache_clear()
+        _sql_pe_campaign_support.cache_clear()
+    elif setting in ("PASSWORD_HASHERS", "MASTER_DB_PASSWORD_HASHER"):
+        _django_hash_algorithms.cache_clear()
+        _dummy_hash.cache_clear()
+
+
+# SQL text is fixed per process (table/columns come from settings), so build it once.
+@lru_cache(maxsize=1)
+def _sql_fetch_by_id() -> str:
+    fm = _field_map()
+    return f"SELECT {_doctor_select_cols()} FROM `{_doctor_table()}` WHERE `{fm['doctor_id']}` = %s LIMIT 1"
 
-    # Validate identifiers
-    for k, v in list(default.items()):
-        default[k] = _safe_identifier(v)
-    return default
+
+@lru_cache(maxsize=1)
+def _sql_fetch_by_email() -> str:
+    # One seek per email column (UNION ALL) instead of a scan over LOWER(col) OR ...
+    # LOWER() stays explicit: the master schema belongs to the admin project, so its collation
+    # is not ours to rely on. deploy/master_db_indexes.sql adds matching LOWER(...) indexes.
+    # Each branch returns which role's column matched plus a priority; ORDER BY the priority
+    # makes a doctor-email match win over staff emails (UNION ALL alone has no defined order).
+    fm = _field_map()
+    cols = ", ".join(f"`{c}`" for c in _auth_col_names())
+    table = _doctor_table()
+    return (
+        f"(SELECT {cols}, 'doctor' AS matched_role, 0 AS match_prio"
+        f" FROM `{table}` WHERE LOWER(`{fm['email']}`) = %s LIMIT 1)"
+        f" UNION ALL "
+        f"(SELECT {cols}, 'clinic_user1', 1 FROM `{table}` WHERE LOWER(`{fm['user1_email']}`) = %s LIMIT 1)"
+        f" UNION ALL "
+        f"(SELECT {cols}, 'clinic_user2', 2 FROM `{table}` WHERE LOWER(`{fm['user2_email']}`) = %s LIMIT 1)"
+        f" ORDER BY match_prio LIMIT 1"
+    )
+
+
+def _password_col(role: str) -> str:
+    fm = _field_map()
+    if role == "clinic_user1":
+        return fm["user1_password"]
+    if role == "clinic_user2":
+        return fm["user2_password"]
+    return fm["doctor_password"]
 
 
-def _dictfetchone(cursor) -> Optional[Dict[str, Any]]:
+@lru_cache(maxsize=4)
+def _sql_update_password(role: str) -> str:
+    fm = _field_map()
+    table = _doctor_table()
+    pwd_col = _password_col(role)
+
+    if role == "doctor" and fm.get("doctor_password_set_at"):
+        return f"UPDATE `{table}` SET `{pwd_col}`=%s, `{fm['doctor_password_set_at']}`=NOW() WHERE `{fm['doctor_id']}`=%s"
+    return f"UPDATE `{table}` SET `{pwd_col}`=%s WHERE `{fm['doctor_id']}`=%s"
+
+
+def _dictfetchone(cursor, cols: Optional[Tuple[str, ...]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Fetch one row as a dict. Pass `cols` when the SELECT list is known up front
+    (e.g. _doctor_col_names()) to skip reading cursor.description.
+    """
     row = cursor.fetchone()
     if not row:
         return None
-    cols = [c[0] for c in cursor.description]
-    return {cols[i]: row[i] for i in range(len(cols))}
+    if cols is None:
+        cols = [c[0] for c in cursor.description]
+    return dict(zip(cols, row))
 
 
-def fetch_master_doctor_row_by_id(doctor_id: str) -> Optional[Dict[str, Any]]:
-    fm = _field_map()
-    table = _doctor_table()
-    with connections[_master_alias()].cursor() as cursor:
-        cursor.execute(
-            f"SELECT * FROM `{table}` WHERE `{fm['doctor_id']}` = %s LIMIT 1",
-            [doctor_id],
+@contextmanager
+def master_cursor(cursor=None) -> Iterator[Any]:
+    """Yield `cursor` when the caller already holds one, otherwise open (and close) a master cursor."""
+    if cursor is not None:
+        yield cursor
+        return
+    with connections[_master_alias()].cursor() as c:
+        yield c
+
+
+_DOCTOR_ROW_CACHE_KEY = "md:doc:{}"
+_DOCTOR_ROW_CACHE_TTL_DEFAULT = 2 * 60
+_PASSWORD_FIELDS = ("doctor_password", "user1_password", "user2_password")
+
+
+def _without_password_cols(row: Dict[str, Any]) -> Dict[str, Any]:
+    pwd_cols = {_field_map()[f] for f in _PASSWORD_FIELDS}
+    return {k: v for k, v in row.items() if k not in pwd_cols}
+
+
+def _doctor_row_cache_key(doctor_id: str) -> str:
+    return _DOCTOR_ROW_CACHE_KEY.format(str(doctor_id or "").strip())
+
+
+def clear_master_doctor_cache(doctor_id: str) -> None:
+    """Drop the cached display row for `doctor_id` (see fetch_master_doctor_row_by_id(cached=True))."""
+    try:
+        cache.delete(_doctor_row_cache_key(doctor_id))
+    except Exception:
+        pass
+
+
+def fetch_master_doctor_row_by_id(
+    doctor_id: str,
+    *,
+    cursor=None,
+    cached: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Full doctor row by primary key. Pass `cursor` to reuse an open master-DB cursor.
+
+    cached=True reads through the Django cache (settings.DOCTOR_CACHE_TTL seconds, "" = not
+    found) for display-only callers. The cached row leaves out the password columns, so
+    password checks must use the default uncached read.
+    """
+    if cached and cursor is None:
+        return _fetch_master_doctor_row_by_id_cached(doctor_id)
+    with master_cursor(cursor) as cur:
+        cur.execute(_sql_fetch_by_id(), [doctor_id])
+        return _dictfetchone(cur, _doctor_col_names())
+
+
+def _fetch_master_doctor_row_by_id_cached(doctor_id: str) -> Optional[Dict[str, Any]]:
+    key = _doctor_row_cache_key(doctor_id)
+    try:
+        hit = cache.get(key)
+    except Exception:
+        hit = None
+    if hit is not None:
+        return hit or None
+
+    row = fetch_master_doctor_row_by_id(doctor_id)
+    if row:
+        # Password hashes stay out of the shared cache.
+        row = _without_password_cols(row)
+    try:
+        cache.set(
+            key,
+            row or "",
+            getattr(settings, "DOCTOR_CACHE_TTL", _DOCTOR_ROW_CACHE_TTL_DEFAULT),
         )
-        return _dictfetchone(cursor)
+    except Exception:
+        pass
+    return row
 
 
-def fetch_master_doctor_row_by_email(email: str) -> Optional[Dict[str, Any]]:
+def fetch_master_doctor_row_by_email(email: str, *, cursor=None) -> Optional[Dict[str, Any]]:
     """
     Finds the row where email matches one of:
       - doctor email
       - clinic_user1_email
       - clinic_user2_email
+
+    The row holds the identity/password columns only (_AUTH_FIELDS); use
+    fetch_master_doctor_row_by_id() for the full clinic details.
+    Pass `cursor` to reuse an open master-DB cursor.
     """
-    fm = _field_map()
-    table = _doctor_table()
+    return _fetch_by_email_with_role(email, cursor=cursor)[0]
+
+
+def _fetch_by_email_with_role(email: str, *, cursor=None) -> Tuple[Optional[Dict[str, Any]], str]:
+    """(row, matched role) for fetch_master_doctor_row_by_email(); role is "" when not found."""
     e = (email or "").strip().lower()
     if not e:
-        return None
+        return None, ""
+
+    with master_cursor(cursor) as cur:
+        cur.execute(_sql_fetch_by_email(), [e, e, e])
+        r = cur.fetchone()
+    if not r:
+        return None, ""
+    cols = _auth_col_names()
+    return dict(zip(cols, r)), str(r[len(cols)] or "")
 
-    with connections[_master_alias()].cursor() as cursor:
-        cursor.execute(
-            f"""
-            SELECT * FROM `{table}`
-            WHERE LOWER(`{fm['email']}`) = %s
-               OR LOWER(`{fm['user1_email']}`) = %s
-               OR LOWER(`{fm['user2_email']}`) = %s
-            LIMIT 1
-            """,
-            [e, e, e],
-        )
-        return _dictfetchone(cursor)
+
+def _g(row: Dict[str, Any], col: str) -> str:
+    """Column value as a stripped string ("" for NULL/empty)."""
+    v = row.get(col)
+    return str(v).strip() if v else ""
 
 
 def _normalize_full_name(first: str, last: str) -> str:
@@ -162,6 +345,37 @@ def _normalize_full_name(first: str, last: str) -> str:
     return " ".join(parts).strip()
 
 
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+# Hash formats recognised by looks_like_hash() with one startswith() over the tuple: raw bcrypt/argon2
+# plus Django's stock algorithm prefixes, even when that hasher is not in this project's
+# PASSWORD_HASHERS (rows may be written by the admin project with a different hasher list).
+_HASH_PREFIXES = _BCRYPT_PREFIXES + (
+    "$argon2",
+    "pbkdf2_sha256$",
+    "pbkdf2_sha1$",
+    "argon2$",
+    "bcrypt_sha256$",
+    "bcrypt$",
+    "scrypt$",
+    "sha1$",
+    "md5$",
+    "unsalted_sha1$",
+)
+_PLAINTEXT_COMPARE_SALT = "peds_edu.master_db.verify_password"
+
+
+@lru_cache(maxsize=1)
+def _django_hash_algorithms() -> frozenset:
+    """Algorithm names of the configured PASSWORD_HASHERS (e.g. pbkdf2_sha256, argon2, bcrypt_sha256)."""
+    return frozenset(h.algorithm for h in get_hashers())
+
+
+def _is_django_hash(s: str) -> bool:
+    # Same decision identify_hasher() makes for "<algorithm>$..." values, without raising.
+    algorithm, sep, _rest = s.partition("$")
+    return bool(sep) and algorithm in _django_hash_algorithms()
+
+
 def looks_like_hash(stored: str) -> bool:
     """
     Best-effort detection for non-reversible stored password formats.
@@ -170,15 +384,8 @@ def looks_like_hash(stored: str) -> bool:
     if not s:
         return False
 
-    # Django-style hashes can be identified
-    try:
-        identify_hasher(s)
-        return True
-    except Exception:
-        pass
-
-    # Common bcrypt / argon2 formats
-    if s.startswith("$2a$") or s.startswith("$2b$") or s.startswith("$2y$") or s.startswith("$argon2"):
+    # Known prefixes first (single C-level startswith), then the configured Django hashers.
+    if s.startswith(_HASH_PREFIXES) or _is_django_hash(s):
         return True
 
     # Heuristic: long strings with separators often indicate hashes
@@ -188,81 +395,88 @@ def looks_like_hash(stored: str) -> bool:
     return False
 
 
-def verify_password(raw_password: str, stored_password: str) -> bool:
+def _check_password(raw_password: str, stored_password: str) -> Tuple[bool, bool]:
     """
-    Supports:
-      - Django-format hashes (identify_hasher + check_password)
-      - bcrypt "$2..." hashes if 'bcrypt' library is installed
-      - plaintext fallback (constant-time compare)
+    (ok, needs_rehash) for a master DB password column. needs_rehash is True for a matching
+    plaintext value or a master-hasher hash with an outdated work factor (_master_hash_outdated);
+    the caller should replace it with make_master_password_hash(). Raw bcrypt and other formats
+    written outside this app are left unchanged.
     """
     raw = raw_password or ""
     stored = (stored_password or "").strip()
     if not raw or not stored:
-        return False
+        return False, False
 
-    # 1) Django hash
-    try:
-        identify_hasher(stored)
-        return check_password(raw, stored)
-    except Exception:
-        pass
+    # 1) Django hash: cheap prefix dispatch instead of identify_hasher() raising for non-hashes
+    if _is_django_hash(stored):
+        try:
+            ok = check_password(raw, stored)
+            return ok, ok and _master_hash_outdated(stored)
+        except Exception:
+            pass
 
     # 2) bcrypt if available
-    if stored.startswith("$2"):
+    elif bcrypt is not None and stored.startswith(_BCRYPT_PREFIXES):
         try:
-            import bcrypt  # type: ignore
-            return bcrypt.checkpw(raw.encode("utf-8"), stored.encode("utf-8"))
+            # Written by the admin project, not us: verify only, never rewrite.
+            return bcrypt.checkpw(raw.encode("utf-8"), stored.encode("utf-8")), False
         except Exception:
             pass
 
-    # 3) plaintext
-    return secrets.compare_digest(raw, stored)
+    # 3) plaintext (legacy rows): burn a real hash check first so a plaintext row takes as
+    #    long as a hashed one, then compare fixed-size HMACs so neither the content nor the
+    #    length of the stored value leaks through timing.
+    check_password(raw, _dummy_hash())
+    ok = hmac.compare_digest(
+        salted_hmac(_PLAINTEXT_COMPARE_SALT, raw, algorithm="sha256").digest(),
+        salted_hmac(_PLAINTEXT_COMPARE_SALT, stored, algorithm="sha256").digest(),
+    )
+    return ok, ok
+
+
+def verify_password(raw_password: str, stored_password: str) -> bool:
+    """
+    Supports:
+      - Django-format hashes (algorithm prefix + check_password)
+      - bcrypt "$2..." hashes if 'bcrypt' library is installed
+      - plaintext fallback (constant-time compare)
+    Plaintext rows are hashed on login by resolve_master_doctor_auth().
+    """
+    return _check_password(raw_password, stored_password)[0]
 
 
-def resolve_master_doctor_identity(email: str) -> Optional[MasterDoctorAuthResult]:
+def resolve_master_doctor_identity(email: str, *, cursor=None) -> Optional[MasterDoctorAuthResult]:
     """
     Find the doctor/staff record in master DB by email, without checking password.
     Useful for forgot-password flows.
     """
-    row = fetch_master_doctor_row_by_email(email)
+    row, matched_role = _fetch_by_email_with_role(email, cursor=cursor)
     if not row:
         return None
 
     fm = _field_map()
     e = (email or "").strip().lower()
 
-    doctor_email = str(row.get(fm["email"], "") or "").strip()
-    user1_email = str(row.get(fm["user1_email"], "") or "").strip()
-    user2_email = str(row.get(fm["user2_email"], "") or "").strip()
-
-    role: Literal["doctor", "clinic_user1", "clinic_user2"] = "doctor"
-    display_name = ""
+    # Doctor's name is needed on every path; compute it once.
+    full_name = _normalize_full_name(
+        _g(row, fm["first_name"]),
+        _g(row, fm["last_name"]),
+    )
 
-    if doctor_email.lower() == e:
-        role = "doctor"
-        display_name = _normalize_full_name(
-            str(row.get(fm["first_name"], "") or ""),
-            str(row.get(fm["last_name"], "") or ""),
-        ) or doctor_email
-    elif user1_email and user1_email.lower() == e:
+    # The UNION ALL branch that matched tells us the role; no need to compare emails again.
+    role: Literal["doctor", "clinic_user1", "clinic_user2"]
+    if matched_role == "clinic_user1":
         role = "clinic_user1"
-        display_name = str(row.get(fm["user1_name"], "") or "").strip() or user1_email
-    elif user2_email and user2_email.lower() == e:
+        display_name = _g(row, fm["user1_name"]) or _g(row, fm["user1_email"])
+    elif matched_role == "clinic_user2":
         role = "clinic_user2"
-        display_name = str(row.get(fm["user2_name"], "") or "").strip() or user2_email
+        display_name = _g(row, fm["user2_name"]) or _g(row, fm["user2_email"])
     else:
-        # Fallback if collation/matching differs
         role = "doctor"
-        display_name = _normalize_full_name(
-            str(row.get(fm["first_name"], "") or ""),
-            str(row.get(fm["last_name"], "") or ""),
-        ) or doctor_email or e
+        display_name = full_name or _g(row, fm["email"]) or e
 
-    doctor_id = str(row.get(fm["doctor_id"], "") or "").strip()
-    doctor_full_name = _normalize_full_name(
-        str(row.get(fm["first_name"], "") or ""),
-        str(row.get(fm["last_name"], "") or ""),
-    ).strip() or display_name
+    doctor_id = _g(row, fm["doctor_id"])
+    doctor_full_name = full_name or display_name
 
     if not doctor_id:
         return None
@@ -286,18 +500,73 @@ def get_stored_password_for_role(row: Dict[str, Any], role: Literal["doctor", "c
     return str(row.get(fm["doctor_password"], "") or "")
 
 
+_MASTER_DEFAULT_HASHER = "pbkdf2_sha256"
+
+
+def make_master_password_hash(raw_password: str) -> str:
+    """
+    Hash a password for the master DB password columns.
+
+    settings.MASTER_DB_PASSWORD_HASHER picks the Django hasher (pbkdf2_sha256, the format the
+    admin project writes, unless set to e.g. "argon2"). If the chosen hasher is not available,
+    falls back to pbkdf2_sha256 so password resets keep working.
+    """
+    hasher = (getattr(settings, "MASTER_DB_PASSWORD_HASHER", "") or _MASTER_DEFAULT_HASHER).strip()
+    try:
+        return make_password(raw_password, hasher=hasher)
+    except ValueError:
+        return make_password(raw_password, hasher=_MASTER_DEFAULT_HASHER)
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    # Built lazily: hashing at import time would slow down every process start.
+    # Same hasher as real master passwords so the timing matches.
+    return make_master_password_hash("!dummy-password-for-timing!")
+
+
+def _master_hash_outdated(stored: str) -> bool:
+    """
+    True when a hash of the master hasher's algorithm has an outdated work factor
+    (django.contrib.auth's must_update logic). Hashes of any other algorithm are not ours to
+    convert: the admin project may have written them and must keep verifying them.
+    """
+    algorithm = _dummy_hash().partition("$")[0]
+    if stored.partition("$")[0] != algorithm:
+        return False
+    try:
+        return get_hasher(algorithm).must_update(stored)
+    except Exception:
+        return False
+
+
 def resolve_master_doctor_auth(email: str, raw_password: str) -> Optional[MasterDoctorAuthResult]:
     """
     Authenticate an email+password against master DB.
     """
     ident = resolve_master_doctor_identity(email)
-    if not ident:
+    stored = get_stored_password_for_role(ident.row, ident.role) if ident else ""
+
+    if not ident or not stored.strip() or not raw_password:
+        # Burn a real hash check so unknown emails / unset passwords take as long as a
+        # wrong password (same hardening as django.contrib.auth.authenticate()).
+        # Empty passwords take this path too: verify_password() would return at once for a known
+        # email, making it distinguishable from an unknown one.
+        check_password(raw_password or "", _dummy_hash())
         return None
 
-    stored = get_stored_password_for_role(ident.row, ident.role)
-    if not verify_password(raw_password, stored):
+    ok, needs_rehash = _check_password(raw_password, stored)
+    if not ok:
         return None
 
+    if needs_rehash:
+        # Plaintext / outdated-work-factor row: upgrade it now that we know the password.
+        # Best-effort: a read-only DB user must not turn a valid login into a failure.
+        try:
+            update_master_password(doctor_id=ident.doctor_id, role=ident.role, new_raw_password=raw_password)
+        except Exception:
+            pass
+
     return ident
 
 
@@ -313,24 +582,24 @@ def master_row_to_template_context(row: Dict[str, Any]) -> Tuple[Dict[str, Any],
     """
     fm = _field_map()
 
-    doctor_id = str(row.get(fm["doctor_id"], "") or "").strip()
-    first = str(row.get(fm["first_name"], "") or "")
-    last = str(row.get(fm["last_name"], "") or "")
+    doctor_id = _g(row, fm["doctor_id"])
+    first = _g(row, fm["first_name"])
+    last = _g(row, fm["last_name"])
     full_name = _normalize_full_name(first, last).strip() or "Doctor"
 
-    doctor_email = str(row.get(fm["email"], "") or "").strip()
-    doctor_whatsapp = str(row.get(fm["whatsapp_no"], "") or "").strip()
-    imc = str(row.get(fm["imc_number"], "") or "").strip()
+    doctor_email = _g(row, fm["email"])
+    doctor_whatsapp = _g(row, fm["whatsapp_no"])
+    imc = _g(row, fm["imc_number"])
 
-    clinic_name = str(row.get(fm["clinic_name"], "") or "").strip()
+    clinic_name = _g(row, fm["clinic_name"])
     clinic_display = clinic_name or f"Dr. {full_name}"
 
-    clinic_phone = str(row.get(fm["clinic_phone"], "") or "").strip()
-    clinic_whatsapp = str(row.get(fm["clinic_whatsapp"], "") or "").strip()
+    clinic_phone = _g(row, fm["clinic_phone"])
+    clinic_whatsapp = _g(row, fm["clinic_whatsapp"])
 
-    clinic_address = str(row.get(fm["clinic_address"], "") or "").strip()
-    postal_code = str(row.get(fm["postal_code"], "") or "").strip()
-    state_raw = str(row.get(fm["state"], "") or "").strip()
+    clinic_address = _g(row, fm["clinic_address"])
+    postal_code = _g(row, fm["postal_code"])
+    state_raw = _g(row, fm["state"])
 
     # Prefer state inferred from PIN (local lookup), if available.
     inferred_state: Optional[str] = None
@@ -409,7 +678,7 @@ def _compact_patient_payload(payload: Dict[str, Any]) -> Any:
         doctor_user = doctor.get("user") or {}
         clinic = (payload or {}).get("clinic") or {}
 
-        return [
+        compact = [
             _PATIENT_PAYLOAD_V2,
             (doctor_user.get("full_name") or "").strip(),
             (clinic.get("display_name") or "").strip(),
@@ -419,27 +688,46 @@ def _compact_patient_payload(payload: Dict[str, Any]) -> Any:
             (clinic.get("state") or "").strip(),
             (clinic.get("postal_code") or "").strip(),
         ]
+        # Trailing empty fields are implied (unsign_patient_payload() pads the list).
+        while len(compact) > 1 and compact[-1] == "":
+            compact.pop()
+        return compact
     except Exception:
         # If anything unexpected happens, fall back to signing the original payload.
         return payload
 
 
+_PATIENT_SIGNER_SALT = "peds_edu.master_db.patient_payload"
+
+# zlib rarely shortens a typical v2 payload (a few short strings); only try it on large ones.
+_PATIENT_PAYLOAD_COMPRESS_MIN = 512
+
+
 def sign_patient_payload(payload: Dict[str, Any]) -> str:
-    """Sign+compress a patient payload for embedding into patient links.
+    """Sign a patient payload for embedding into patient links.
 
     NOTE: We compact the payload (v2 list format) to shorten the generated URL.
+    Compression is only attempted for payloads above _PATIENT_PAYLOAD_COMPRESS_MIN characters;
+    signing.loads() accepts both compressed and uncompressed tokens.
     """
     obj: Any = payload
     if isinstance(payload, dict):
         obj = _compact_patient_payload(payload)
 
-    return signing.dumps(obj, compress=True)
+    if isinstance(obj, list):
+        compress = sum(len(v) for v in obj if isinstance(v, str)) > _PATIENT_PAYLOAD_COMPRESS_MIN
+    else:
+        compress = True
+    # Plain Signer: patient links never expire (unsign uses max_age=None), so the
+    # TimestampSigner timestamp used by signing.dumps() was dead weight in every URL.
+    return signing.Signer(salt=_PATIENT_SIGNER_SALT).sign_object(obj, compress=compress)
 
 
 def unsign_patient_payload(token: str) -> Optional[Dict[str, Any]]:
     """Reverse sign_patient_payload().
 
     Backward compatible:
+      - Tokens from signing.dumps() (before the salted Signer) still verify.
       - Old tokens (dict payloads) still load as dicts.
       - New tokens load as a v2 list, which is expanded back into the dict structure.
     """
@@ -447,9 +735,13 @@ def unsign_patient_payload(token: str) -> Optional[Dict[str, Any]]:
         return None
 
     try:
-        obj = signing.loads(token, max_age=None)
+        obj = signing.Signer(salt=_PATIENT_SIGNER_SALT).unsign_object(token)
     except Exception:
-        return None
+        # Links issued before the switch to Signer were made with signing.dumps().
+        try:
+            obj = signing.loads(token, max_age=None)
+        except Exception:
+            return None
 
     if isinstance(obj, dict):
         return obj
@@ -522,10 +814,25 @@ def unsign_patient_payload(token: str) -> Optional[Dict[str, Any]]:
 #         return None
 
 
+# Excludes ambiguous characters for phone dictation.
+_TEMP_PASSWORD_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz23456789"
+# Largest multiple of the alphabet size <= 256; bytes at or above it are rejected (no modulo bias).
+_TEMP_PASSWORD_BYTE_LIMIT = 256 - 256 % len(_TEMP_PASSWORD_ALPHABET)
+
+
 def generate_temporary_password(length: int = 10) -> str:
-    # Excludes ambiguous characters for phone dictation.
-    alphabet = "ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz23456789"
-    return "".join(secrets.choice(alphabet) for _ in range(max(8, length)))
+    # One urandom read per password (instead of one per character via secrets.choice),
+    # mapped onto the alphabet with rejection sampling.
+    n = max(8, length)
+    size = len(_TEMP_PASSWORD_ALPHABET)
+    out: List[str] = []
+    while len(out) < n:
+        for b in secrets.token_bytes(n * 2):
+            if b < _TEMP_PASSWORD_BYTE_LIMIT:
+                out.append(_TEMP_PASSWORD_ALPHABET[b % size])
+                if len(out) == n:
+                    break
+    return "".join(out)
 
 
 def update_master_password(
@@ -533,39 +840,23 @@ def update_master_password(
     doctor_id: str,
     role: Literal["doctor", "clinic_user1", "clinic_user2"],
     new_raw_password: str,
+    cursor=None,
 ) -> bool:
     """
     Used by the forgot-password flow when stored passwords are hashes (not retrievable).
     Updates the appropriate password hash column in redflags_doctor.
 
-    Requires UPDATE privilege on the master DB.
+    Requires UPDATE privilege on the master DB. Pass `cursor` to reuse an open master-DB cursor.
     """
-    fm = _field_map()
-    table = _doctor_table()
+    # Store Django-style hash (settings.MASTER_DB_PASSWORD_HASHER; pbkdf2_sha256 by default)
+    new_hash = make_master_password_hash(new_raw_password)
 
-    if role == "clinic_user1":
-        pwd_col = fm["user1_password"]
-    elif role == "clinic_user2":
-        pwd_col = fm["user2_password"]
-    else:
-        pwd_col = fm["doctor_password"]
-
-    # Store Django-style hash (pbkdf2_sha256 by default)
-    new_hash = make_password(new_raw_password)
-
-    with connections[getattr(settings, "MASTER_DB_ALIAS", "master")].cursor() as cursor:
-        if role == "doctor" and fm.get("doctor_password_set_at"):
-            cursor.execute(
-                f"UPDATE `{table}` SET `{pwd_col}`=%s, `{fm['doctor_password_set_at']}`=NOW() WHERE `{fm['doctor_id']}`=%s LIMIT 1",
-                [new_hash, doctor_id],
-            )
-        else:
-            cursor.execute(
-                f"UPDATE `{table}` SET `{pwd_col}`=%s WHERE `{fm['doctor_id']}`=%s LIMIT 1",
-                [new_hash, doctor_id],
-            )
+    with master_cursor(cursor) as cur:
+        cur.execute(_sql_update_password(role), [new_hash, doctor_id])
+    clear_master_doctor_cache(doctor_id)  # clinic_password_set_at changed
     return True
 
+
 # ---------------------------------------------------------------------
 # Campaign acknowledgements & banners (Doctor/Clinic sharing portal)
 # ---------------------------------------------------------------------
@@ -580,48 +871,41 @@ class PECampaignSupport:
     banner_target_url: str
 
 
+@lru_cache(maxsize=1)
 def _master_db_name() -> str:
     conn = connections[_master_alias()]
     return str((conn.settings_dict.get("NAME") or "")).strip()
 
 
-def _master_table_exists(table_name: str) -> bool:
-    """
-    Checks if a table exists in MASTER DB.
-    Uses information_schema when possible; falls back to a direct SELECT probe.
-    """
-    tn = _safe_identifier(table_name)
-    db = _master_db_name()
-    if not db:
-        return False
+# information_schema lookups are slow on a busy server and the schema does not change at
+# runtime: cache the column list per (db, table); it also answers "does the table exist".
+# Failed lookups are not cached.
+_SCHEMA_COLUMNS_CACHE: Dict[Tuple[str, str], Tuple[str, ...]] = {}
 
-    try:
-        with connections[_master_alias()].cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT 1
-                FROM information_schema.tables
-                WHERE table_schema = %s AND table_name = %s
-                LIMIT 1
-                """,
-                [db, tn],
-            )
-            return cursor.fetchone() is not None
-    except Exception:
-        # Fallback: probe query
-        try:
-            with connections[_master_alias()].cursor() as cursor:
-                cursor.execute(f"SELECT 1 FROM `{tn}` LIMIT 1")
-                return True
-        except Exception:
-            return False
+
+# Resolved (table, campaign_col, video_cluster_col) of the mapping table, keyed by (db, table).
+_VC_MAPPING_CACHE: Dict[Tuple[str, str], Optional[Tuple[str, str, str]]] = {}
+
+
+def _schema_cache_clear() -> None:
+    _SCHEMA_COLUMNS_CACHE.clear()
+    _VC_MAPPING_CACHE.clear()
 
 
 def _master_table_columns(table_name: str) -> List[str]:
+    """
+    Column names of a MASTER DB table; [] means the table does not exist (or cannot be read).
+    Uses information_schema when possible; falls back to a `SELECT * ... LIMIT 0` probe.
+    """
     tn = _safe_identifier(table_name)
     db = _master_db_name()
     if not db:
         return []
+
+    cached = _SCHEMA_COLUMNS_CACHE.get((db, tn))
+    if cached is not None:
+        return list(cached)
+
     try:
         with connections[_master_alias()].cursor() as cursor:
             cursor.execute(
@@ -633,9 +917,18 @@ def _master_table_columns(table_name: str) -> List[str]:
                 [db, tn],
             )
             rows = cursor.fetchall() or []
-        return [str(r[0]) for r in rows if r and r[0]]
+        cols = tuple(str(r[0]) for r in rows if r and r[0])
     except Exception:
-        return []
+        # Fallback: probe the table itself and read the column names from the cursor.
+        try:
+            with connections[_master_alias()].cursor() as cursor:
+                cursor.execute(f"SELECT * FROM `{tn}` LIMIT 0")
+                cols = tuple(str(c[0]) for c in cursor.description or ())
+        except Exception:
+            return []
+
+    _SCHEMA_COLUMNS_CACHE[(db, tn)] = cols
+    return list(cols)
 
 
 def _pick_first_col(cols: List[str], candidates: List[str]) -> Optional[str]:
@@ -646,19 +939,42 @@ def _pick_first_col(cols: List[str], candidates: List[str]) -> Optional[str]:
     return None
 
 
+@lru_cache(maxsize=1024)
 def _uuid_hex_to_hyphenated(hex32: str) -> str:
     """
     Convert 32-hex UUID (no dashes) to standard UUID with dashes.
+    Memoized: the same few campaign ids recur on every portal request.
     """
     h = (hex32 or "").strip().replace("-", "")
     if len(h) != 32:
         return (hex32 or "").strip()
-    return f"{h[0:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:32]}"
+    try:
+        return str(uuid.UUID(hex=h))
+    except ValueError:
+        # Not hex: leave as-is rather than inventing a UUID-shaped id.
+        return (hex32 or "").strip()
+
+
+def campaign_key(campaign_id: Any) -> str:
+    """Campaign ids appear both as CHAR(32) hex and as dashed UUIDs; compare them dashless/lowercase."""
+    return str(campaign_id or "").strip().replace("-", "").lower()
+
+
+def campaign_id_forms(campaign_ids: Iterable[Any]) -> List[str]:
+    """Distinct dashless + hyphenated forms of the given ids, for `col IN (...)` lookups."""
+    forms: Dict[str, None] = {}
+    for c in campaign_ids or ():
+        cid = campaign_key(c)
+        if cid:
+            forms[cid] = None
+            forms[_uuid_hex_to_hyphenated(cid)] = None
+    return list(forms)
 
 
-def _get_video_cluster_from_master_mapping(campaign_id: str) -> Optional[str]:
+def _master_videocluster_mapping() -> Optional[Tuple[str, str, str]]:
     """
-    Attempts to read video_cluster from MASTER DB mapping table.
+    (table, campaign_col, video_cluster_col) of the MASTER DB mapping table, or None.
+
     Your prompt references: campaign_videocluster in master DB.
     The provided MASTER_DB_ALIAS.sql does not include this table, so this is best-effort.
 
@@ -666,98 +982,186 @@ def _get_video_cluster_from_master_mapping(campaign_id: str) -> Optional[str]:
       - campaign_id (or similar)
       - video_cluster (or similar)
     """
-    cid = (campaign_id or "").strip().replace("-", "")
-    if not cid:
-        return None
-
     table = getattr(settings, "MASTER_CAMPAIGN_VIDEOCLUSTER_TABLE", "campaign_videocluster") or "campaign_videocluster"
     try:
         table = _safe_identifier(str(table))
     except Exception:
         table = "campaign_videocluster"
 
-    if not _master_table_exists(table):
-        return None
+    key = (_master_db_name(), table)
+    if key in _VC_MAPPING_CACHE:
+        return _VC_MAPPING_CACHE[key]
+
+    mapping: Optional[Tuple[str, str, str]] = None
+    cols = _master_table_columns(table)  # empty: no such table
+    if cols:
+        campaign_col = _pick_first_col(cols, ["campaign_id", "campaign", "campaign_uuid"])
+        vc_col = _pick_first_col(
+            cols,
+            ["video_cluster", "video_cluster_code", "video_cluster_name", "video_cluster_id", "cluster", "cluster_code"],
+        )
+        if campaign_col and vc_col:
+            mapping = (table, campaign_col, vc_col)
 
-    cols = _master_table_columns(table)
-    if not cols:
-        return None
+    # Only remember the answer once the column list has actually been read for this table,
+    # so a transient lookup failure is retried on the next call.
+    if key in _SCHEMA_COLUMNS_CACHE:
+        _VC_MAPPING_CACHE[key] = mapping
+    return mapping
 
-    campaign_col = _pick_first_col(cols, ["campaign_id", "campaign", "campaign_uuid"])
-    vc_col = _pick_first_col(
-        cols,
-        ["video_cluster", "video_cluster_code", "video_cluster_name", "video_cluster_id", "cluster", "cluster_code"],
-    )
-    if not campaign_col or not vc_col:
-        return None
 
-    cid_h = _uuid_hex_to_hyphenated(cid)
+def _query_local_publisher_campaign_extras(campaign_ids: Iterable[Any]) -> Dict[str, Tuple[str, str]]:
+    """
+    Batch read of (new_video_cluster_name, banner_target_url) from local publisher_campaign.
+
+    publisher_campaign.campaign_id is a UUID string WITH dashes in default DB.
+    master campaign ids are usually CHAR(32) WITHOUT dashes. Both forms are matched with a
+    plain `IN (...)` so the unique index on campaign_id is used.
+    Returns {campaign_key(campaign_id): (video_cluster, banner_target_url)}; DB errors propagate.
+    """
+    forms = campaign_id_forms(campaign_ids)
+    if not forms:
+        return {}
 
-    try:
-        with connections[_master_alias()].cursor() as cursor:
-            cursor.execute(
-                f"SELECT `{vc_col}` FROM `{table}` WHERE `{campaign_col}` = %s OR `{campaign_col}` = %s LIMIT 1",
-                [cid, cid_h],
+    out: Dict[str, Tuple[str, str]] = {}
+    with connections["default"].cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT campaign_id, new_video_cluster_name, banner_target_url
+            FROM publisher_campaign
+            WHERE campaign_id IN ({', '.join(['%s'] * len(forms))})
+            """,
+            forms,
+        )
+        for cid, vc, target in cursor.fetchall() or []:
+            out.setdefault(
+                campaign_key(cid),
+                (str(vc or "").strip(), str(target or "").strip()),
             )
-            row = cursor.fetchone()
-        if not row or row[0] is None:
-            return None
-        return str(row[0]).strip()
+    return out
+
+
+# Local publisher_campaign video cluster / banner target lookups are shared by every doctor
+# enrolled in a campaign, so they are cached (Django cache; Redis in production).
+# publisher_campaign edits clear them via publisher.signals.
+CAMPAIGN_VC_CACHE_TTL = 5 * 60
+_CAMPAIGN_EXTRAS_CACHE_KEY = "pe_campaign_local_extras_v1:{}"
+
+
+def clear_campaign_vc_cache(campaign_id: str) -> None:
+    key = campaign_key(campaign_id)
+    if not key:
+        return
+    try:
+        cache.delete(_CAMPAIGN_EXTRAS_CACHE_KEY.format(key))
     except Exception:
-        return None
+        pass
 
 
-def _get_video_cluster_from_local_publisher_campaign(campaign_id: str) -> Optional[str]:
+def _get_local_publisher_campaign_extras_cached(campaign_ids: Iterable[Any]) -> Dict[str, Tuple[str, str]]:
     """
-    Fallback resolver:
-    publisher_campaign.campaign_id is a UUID string WITH dashes in default DB.
-    master campaign ids are usually CHAR(32) WITHOUT dashes.
+    Cached _query_local_publisher_campaign_extras(); campaigns without a local row are cached as
+    ("", ""). A failed query returns {} for the missing ids and caches nothing.
     """
-    cid = (campaign_id or "").strip().replace("-", "")
-    if not cid:
-        return None
+    keys = list(dict.fromkeys(k for k in (campaign_key(c) for c in campaign_ids or ()) if k))
+    if not keys:
+        return {}
 
     try:
-        with connections["default"].cursor() as cursor:
-            cursor.execute(
-                """
-                SELECT new_video_cluster_name
-                FROM publisher_campaign
-                WHERE REPLACE(campaign_id, '-', '') = %s
-                LIMIT 1
-                """,
-                [cid],
-            )
-            row = cursor.fetchone()
-        if row and row[0]:
-            return str(row[0]).strip()
+        hits = cache.get_many([_CAMPAIGN_EXTRAS_CACHE_KEY.format(k) for k in keys])
     except Exception:
-        return None
+        hits = {}
+
+    out: Dict[str, Tuple[str, str]] = {}
+    missing: List[str] = []
+    for k in keys:
+        v = hits.get(_CAMPAIGN_EXTRAS_CACHE_KEY.format(k))
+        if v is None:
+            missing.append(k)
+        else:
+            out[k] = tuple(v)  # type: ignore[assignment]
 
-    return None
+    if missing:
+        try:
+            found = _query_local_publisher_campaign_extras(missing)
+        except Exception:
+            # Do not cache "not found" for a failed query.
+            found = None
+        if found is not None:
+            to_cache = {}
+            for k in missing:
+                v = found.get(k, ("", ""))
+                out[k] = v
+                to_cache[_CAMPAIGN_EXTRAS_CACHE_KEY.format(k)] = v
+            try:
+                cache.set_many(to_cache, CAMPAIGN_VC_CACHE_TTL)
+            except Exception:
+                pass
 
+    return {k: v for k, v in out.items() if v != ("", "")}
 
-def resolve_campaign_video_cluster(*, campaign_id: str, campaign_name_fallback: str = "") -> str:
-    """
-    Priority:
-      1) MASTER mapping table (campaign_videocluster) if present
-      2) local default DB publisher_campaign.new_video_cluster_name
-      3) campaign name (from campaign_campaign.name)
-      4) campaign_id (last resort)
-    """
-    cid = (campaign_id or "").strip()
-    if not cid:
-        return (campaign_name_fallback or "").strip() or ""
 
-    vc = _get_video_cluster_from_master_mapping(cid)
-    if vc:
-        return vc
+# Compiled once; strips every non-digit, including the bidi marks / en dashes that
+# copied WhatsApp numbers carry.
+_NON_DIGIT_RE = re.compile(r"\D")
+
 
-    vc = _get_video_cluster_from_local_publisher_campaign(cid)
-    if vc:
-        return vc
+# The statement text only varies with the candidate counts and (cached) schema facts, so
+# each shape is built once; identical text per shape also lets the server reuse its plan.
+@lru_cache(maxsize=64)
+def _sql_pe_campaign_support(
+    n_emails: int,
+    n_phones: int,
+    phone_expr: str,
+    mapping: Optional[Tuple[str, str, str]],
+) -> str:
+    where_parts: List[str] = []
 
-    return (campaign_name_fallback or "").strip() or cid
+    if n_emails:
+        # Candidates are lowercased; LOWER() keeps the match case-insensitive whatever the
+        # admin project's collation is, and is served by the LOWER(email) functional index.
+        where_parts.append("LOWER(d.email) IN (" + ",".join(["%s"] * n_emails) + ")")
+
+    if n_phones:
+        # campaign_doctor.phone is typically stored as digits; we compare last-10 to handle +91 prefixes.
+        where_parts.append(f"{phone_expr} IN (" + ",".join(["%s"] * n_phones) + ")")
+
+    where_sql = " OR ".join(where_parts)
+
+    # IMPORTANT:
+    # The shared MASTER_DB_ALIAS.sql shows campaign_doctorcampaignenrollment has NO "active" column.
+    # If we filter on e.active, the query fails and banners never render (doctor_share catches and shows none).
+    # Fold the optional campaign_videocluster mapping into the same query. Mapping rows may hold
+    # the id dashless (as c.id) or hyphenated; both forms are compared so its index can be used.
+    vc_select = "NULL"
+    vc_join = ""
+    if mapping:
+        vc_table, vc_campaign_col, vc_col = mapping
+        vc_select = f"vc.`{vc_col}`"
+        vc_join = (
+            f"LEFT JOIN `{vc_table}` vc ON vc.`{vc_campaign_col}` IN ("
+            "c.id, CONCAT_WS('-', SUBSTRING(c.id, 1, 8), SUBSTRING(c.id, 9, 4), SUBSTRING(c.id, 13, 4), "
+            "SUBSTRING(c.id, 17, 4), SUBSTRING(c.id, 21, 12)))"
+        )
+
+    return f"""
+        SELECT
+            c.id,
+            c.name,
+            c.banner_small_url,
+            c.banner_large_url,
+            c.banner_target_url,
+            COALESCE(NULLIF(TRIM(b.name), ''), 'our partner') AS brand_name,
+            {vc_select} AS video_cluster
+        FROM campaign_doctor d
+        JOIN campaign_doctorcampaignenrollment e ON e.doctor_id = d.id
+        JOIN campaign_campaign c ON c.id = e.campaign_id
+        LEFT JOIN campaign_brand b ON b.id = c.brand_id
+        {vc_join}
+        WHERE ({where_sql})
+          AND c.system_pe = 1
+        ORDER BY c.start_date DESC, c.created_at DESC, c.id ASC
+    """
 
 
 def fetch_pe_campaign_support_for_doctor_email(
@@ -779,28 +1183,14 @@ def fetch_pe_campaign_support_for_doctor_email(
       - campaign_id, campaign_name, video_cluster, brand, banner_small_url, banner_large_url, banner_target_url
     """
 
+    # dict.fromkeys(): order-preserving dedupe in one C-level pass.
     def _norm_emails(values: "Sequence[str]") -> List[str]:
-        seen = set()
-        out_: List[str] = []
-        for v in values or ():
-            s = (v or "").strip().lower()
-            if s and s not in seen:
-                seen.add(s)
-                out_.append(s)
-        return out_
+        norm = ((v or "").strip().lower() for v in values or ())
+        return list(dict.fromkeys(s for s in norm if s))
 
     def _norm_phones(values: "Sequence[str]") -> List[str]:
-        seen = set()
-        out_: List[str] = []
-        for v in values or ():
-            digits = re.sub(r"\D", "", str(v or ""))
-            if not digits:
-                continue
-            last10 = digits[-10:] if len(digits) > 10 else digits
-            if last10 and last10 not in seen:
-                seen.add(last10)
-                out_.append(last10)
-        return out_
+        norm = (_NON_DIGIT_RE.sub("", str(v or "")) for v in values or ())
+        return list(dict.fromkeys(d[-10:] for d in norm if d))
 
     primary_email = (email or "").strip()
     email_candidates = _norm_emails([primary_email, *list(extra_emails or [])])
@@ -809,81 +1199,47 @@ def fetch_pe_campaign_support_for_doctor_email(
     if not email_candidates and not phone_candidates:
         return []
 
-    where_parts: List[str] = []
-    params: List[Any] = []
-
-    if email_candidates:
-        where_parts.append(
-            "LOWER(d.email) IN (" + ",".join(["%s"] * len(email_candidates)) + ")"
-        )
-        params.extend(email_candidates)
-
+    # Use the indexed generated column from deploy/master_db_indexes.sql when it exists.
+    phone_expr = ""
     if phone_candidates:
-        # campaign_doctor.phone is typically stored as digits; we compare last-10 to handle +91 prefixes.
-        where_parts.append(
-            "RIGHT(d.phone, 10) IN (" + ",".join(["%s"] * len(phone_candidates)) + ")"
-        )
-        params.extend(phone_candidates)
-
-    where_sql = " OR ".join(where_parts)
-
-    # IMPORTANT:
-    # The shared MASTER_DB_ALIAS.sql shows campaign_doctorcampaignenrollment has NO "active" column.
-    # If we filter on e.active, the query fails and banners never render (doctor_share catches and shows none).
-    sql = f"""
-        SELECT
-            c.id,
-            c.name,
-            c.banner_small_url,
-            c.banner_large_url,
-            c.banner_target_url,
-            COALESCE(b.name, '') AS brand_name
-        FROM campaign_doctor d
-        JOIN campaign_doctorcampaignenrollment e ON e.doctor_id = d.id
-        JOIN campaign_campaign c ON c.id = e.campaign_id
-        LEFT JOIN campaign_brand b ON b.id = c.brand_id
-        WHERE ({where_sql})
-          AND c.system_pe = 1
-        ORDER BY c.start_date DESC, c.created_at DESC, c.id ASC
-    """
+        phone_expr = "d.phone_last10" if "phone_last10" in _master_table_columns("campaign_doctor") else "RIGHT(d.phone, 10)"
+    sql = _sql_pe_campaign_support(
+        len(email_candidates), len(phone_candidates), phone_expr, _master_videocluster_mapping()
+    )
+    params = [*email_candidates, *phone_candidates]
 
     with connections[_master_alias()].cursor() as cursor:
         cursor.execute(sql, params)
         rows = cursor.fetchall()
 
+    # Local (default DB) fallbacks for all campaigns at once: one publisher_campaign query.
+    campaign_ids = list(dict.fromkeys(r[0] for r in rows or [] if r[0]))
+    local_extras = _get_local_publisher_campaign_extras_cached(campaign_ids)
+
     out: List[Dict[str, str]] = []
     seen_campaign_ids = set()
 
-    for r in rows or []:
-        cid = (r[0] or "")
+    for cid, cname, b_small, b_large, b_target, brand, master_vc in rows or []:
         if not cid or cid in seen_campaign_ids:
             continue
         seen_campaign_ids.add(cid)
 
-        cname = str(r[1] or "").strip()
-        vcluster = resolve_campaign_video_cluster(campaign_id=str(cid), campaign_name_fallback=cname)
-        brand = str(r[5] or "").strip()
-
-        banner_small_url = str(r[2] or "").strip()
-        banner_large_url = str(r[3] or "").strip()
-        banner_target_url = str(r[4] or "").strip()
+        local_vc, local_target = local_extras.get(campaign_key(cid), ("", ""))
 
-        # Fallback: if master has no target URL, try local publisher_campaign.banner_target_url
-        if not banner_target_url:
-            try:
-                banner_target_url = _get_banner_target_url_from_local_publisher_campaign(str(cid)) or ""
-            except Exception:
-                banner_target_url = ""
+        # Priority: master mapping, local publisher_campaign, campaign name, campaign id.
+        cname = str(cname or "").strip()
+        vcluster = str(master_vc or "").strip() or local_vc or cname or str(cid).strip()
 
         out.append(
             {
                 "campaign_id": str(cid),
                 "campaign_name": cname,
                 "video_cluster": vcluster,
-                "brand": brand,
-                "banner_small_url": banner_small_url,
-                "banner_large_url": banner_large_url,
-                "banner_target_url": banner_target_url,
+                "brand": str(brand or "").strip(),
+                "banner_small_url": str(b_small or "").strip(),
+                "banner_large_url": str(b_large or "").strip(),
+                # Fallback: if master has no target URL, use local publisher_campaign.banner_target_url
+                "banner_target_url": str(b_target or "").strip() or local_target,
             }
         )
 
@@ -6,6 +6,7 @@ Configuration is done primarily via environment variables.
 
 from __future__ import annotations
 
+import importlib.util
 import json
 import os
 from pathlib import Path
@@ -83,6 +84,14 @@ TEMPLATES = [
 WSGI_APPLICATION = "peds_edu.wsgi.application"
 
 # ---------------- DATABASE ----------------
+# Persistent connections: reuse each worker's MySQL connection across requests instead of
+# reconnecting (TCP + auth handshake) per request. Keep below MySQL's wait_timeout; 0 disables.
+# CONN_HEALTH_CHECKS pings a reused connection at the start of a request so one dropped by the
+# server (RDS failover, idle timeout) is replaced instead of failing the first query.
+# isolation_level is applied by Django's MySQL backend when it opens the connection (READ
+# COMMITTED, as Django recommends for MySQL), not with a per-query SET.
+DB_CONN_MAX_AGE = int(env("DB_CONN_MAX_AGE", "60"))
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.mysql",  # Force MySQL
@@ -91,7 +100,9 @@ DATABASES = {
         "PASSWORD": env("DB_PASSWORD", "Bv9ALOgzFszxDYso"),
         "HOST": env("DB_HOST", "35.154.221.92"),
         "PORT": env("DB_PORT", "3306"),
-        "OPTIONS": {"charset": "utf8mb4"},
+        "OPTIONS": {"charset": "utf8mb4", "isolation_level": "read committed"},
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
@@ -128,6 +139,9 @@ if MASTER_DB_NAME and MASTER_DB_USER and MASTER_DB_PASSWORD and MASTER_DB_HOST:
         "PASSWORD": MASTER_DB_PASSWORD,
         "HOST": MASTER_DB_HOST,
         "PORT": MASTER_DB_PORT,
+        "OPTIONS": {"charset": "utf8mb4", "isolation_level": "read committed"},
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
     }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -137,6 +151,18 @@ AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.NumericPasswordValidator"},
 ]
 
+# Argon2id for new portal (accounts.User) hashes when argon2-cffi is installed; the other hashers
+# stay listed so existing PBKDF2/bcrypt hashes still verify and are upgraded on the next login.
+# Master DB passwords do not follow this list, see MASTER_DB_PASSWORD_HASHER.
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+if importlib.util.find_spec("argon2") is not None:
+    PASSWORD_HASHERS.insert(0, "django.contrib.auth.hashers.Argon2PasswordHasher")
+
 AUTH_USER_MODEL = "accounts.User"
 
 LANGUAGE_CODE = "en"
@@ -229,6 +255,17 @@ EMAIL_HOST_USER = env("EMAIL_HOST_USER", "apikey")
 EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", SENDGRID_API_KEY)
 DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", SENDGRID_FROM_EMAIL)
 
+# Mails the user can simply request again are handed to a small in-process thread pool
+# (accounts/email_queue.py) so SendGrid/SMTP latency is not added to the HTTP response.
+# Password-reset and access mails are still sent inline. Set EMAIL_SEND_ASYNC=0 to send everything inline.
+EMAIL_SEND_ASYNC = env("EMAIL_SEND_ASYNC", "1") == "1"
+EMAIL_SEND_WORKERS = int(env("EMAIL_SEND_WORKERS", "4"))
+EMAIL_SEND_MAX_RETRIES = int(env("EMAIL_SEND_MAX_RETRIES", "5"))
+
+# Forgot-password throttling (accounts/ratelimit.py), counted in the default cache.
+RATELIMIT_RESET_PASSWORD = env("RATELIMIT_RESET_PASSWORD", "20/m")
+RATELIMIT_RESET_PASSWORD_EMAIL = env("RATELIMIT_RESET_PASSWORD_EMAIL", "5/m")
+
 # ---------------- CACHE ----------------
 REDIS_URL = os.getenv("REDIS_URL")
 if REDIS_URL:
@@ -249,6 +286,16 @@ else:
         }
     }
 
+# Seconds the portal caches a master doctor row for display (peds_edu.master_db); 0 disables.
+DOCTOR_CACHE_TTL = int(env("DOCTOR_CACHE_TTL", "120"))
+
+# Sessions live in Redis when it is configured (SESSION_SAVE_EVERY_REQUEST would otherwise
+# UPDATE django_session on every request). LocMem is per-process, so without Redis keep the DB backend.
+SESSION_ENGINE = env(
+    "SESSION_ENGINE",
+    "django.contrib.sessions.backends.cache" if REDIS_URL else "django.contrib.sessions.backends.db",
+)
+
 CATALOG_CACHE_SECONDS = int(env("CATALOG_CACHE_SECONDS", str(60 * 60)))
 
 # ---------------- LOGGING ----------------
@@ -290,6 +337,12 @@ SSO_SESSION_KEY_CAMPAIGN = "campaign_id"
 # Master DB alias name used throughout the code
 MASTER_DB_ALIAS = os.getenv("MASTER_DB_ALIAS", "master").strip()
 
+# Django hasher used for passwords written to the master DB (see peds_edu.master_db.make_master_password_hash).
+# The admin project reads and writes these columns too, so this stays on what it writes
+# (pbkdf2_sha256) unless set explicitly, e.g. "argon2" once the admin project can verify it.
+# Only hashes of this algorithm are upgraded on login; other formats are left as they are.
+MASTER_DB_PASSWORD_HASHER = os.getenv("MASTER_DB_PASSWORD_HASHER", "pbkdf2_sha256").strip()
+
 # ---------------------------------------------------------------------
 # MASTER DATA TABLE NAMES (configure to match the admin Django project DB)
 # ---------------------------------------------------------------------
@@ -345,8 +398,9 @@ DATABASES[MASTER_DB_ALIAS] = {
     "PASSWORD": "Hemsod-vytsew-7qypxa",
     "HOST": "new-forms-rds.cbnobb8kfeuq.ap-south-1.rds.amazonaws.com",
     "PORT": "3306",
-    "OPTIONS": {"charset": "utf8mb4"},
-    "CONN_MAX_AGE": 60,
+    "OPTIONS": {"charset": "utf8mb4", "isolation_level": "read committed"},
+    "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+    "CONN_HEALTH_CHECKS": True,
 }
 
 
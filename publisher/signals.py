@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from peds_edu.master_db import campaign_key, clear_campaign_vc_cache
+
+from .models import Campaign
+
+# Registration email templates are read on every doctor signup (accounts/views.py);
+# keyed on the campaign_id with dashes removed.
+CAMPAIGN_EMAIL_TEMPLATE_CACHE_KEY = "campaign_email_registration_v1:{}"
+CAMPAIGN_EMAIL_TEMPLATE_CACHE_TTL = 60 * 60
+
+
+def campaign_email_template_cache_key(campaign_id: str) -> str:
+    return CAMPAIGN_EMAIL_TEMPLATE_CACHE_KEY.format(campaign_key(campaign_id))
+
+
+def clear_campaign_email_template_cache(campaign_id: str) -> None:
+    try:
+        cache.delete(campaign_email_template_cache_key(campaign_id))
+    except Exception:
+        pass
+
+
+@receiver(post_save, sender=Campaign)
+@receiver(post_delete, sender=Campaign)
+def _on_campaign_change(sender, instance, **kwargs):
+    campaign_id = getattr(instance, "campaign_id", "") or ""
+    clear_campaign_email_template_cache(campaign_id)
+    # Video cluster / banner target fallbacks read from publisher_campaign (peds_edu.master_db).
+    clear_campaign_vc_cache(campaign_id)
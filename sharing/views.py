@@ -11,6 +11,7 @@ from catalog.constants import LANGUAGE_CODES, LANGUAGES
 from catalog.models import Video, VideoLanguage, VideoCluster, VideoClusterLanguage
 
 from peds_edu.master_db import (
+    campaign_id_forms,
     fetch_master_doctor_row_by_id,
     master_row_to_template_context,
     build_patient_link_payload,
@@ -112,7 +113,8 @@ def _fetch_all_campaign_bundle_codes() -> set[str]:
 
 
 def _fetch_allowed_bundle_codes_for_campaigns(campaign_ids: list[str]) -> set[str]:
-    ids = [str(c).strip().replace("-", "") for c in (campaign_ids or []) if str(c).strip()]
+    # Match both the dashless and hyphenated forms so the unique index on campaign_id is used.
+    ids = campaign_id_forms(campaign_ids)
     if not ids:
         return set()
 
@@ -121,7 +123,7 @@ def _fetch_allowed_bundle_codes_for_campaigns(campaign_ids: list[str]) -> set[st
         SELECT DISTINCT vc.code
         FROM publisher_campaign pc
         JOIN catalog_videocluster vc ON vc.id = pc.video_cluster_id
-        WHERE REPLACE(pc.campaign_id, '-', '') IN ({placeholders})
+        WHERE pc.campaign_id IN ({placeholders})
           AND pc.video_cluster_id IS NOT NULL
     """
 
@@ -140,7 +142,7 @@ def doctor_share(request: HttpRequest, doctor_id: str) -> HttpResponse:
     if not session_doctor_id or session_doctor_id != doctor_id:
         return HttpResponseForbidden("Not allowed")
 
-    row = fetch_master_doctor_row_by_id(doctor_id)
+    row = fetch_master_doctor_row_by_id(doctor_id, cached=True)
     if not row:
         return HttpResponseForbidden("Doctor not found")
 